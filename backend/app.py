@@ -1,35 +1,88 @@
 # backend/app.py
+#
+# Run from anywhere:
+#   python backend/app.py            (dev server)
+#   flask --app backend.app run
+#   gunicorn -w 4 --threads 32 "backend.app:create_app()"
+#
+# Serve with threaded WSGI workers: a request holds its thread while it
+# waits on CORQ/OpenRouter, so size workers × threads for the expected
+# concurrent requests, not for CPU count. Upstream calls share one pooled
+# client per process (services.http_client) across all threads.
+#
+# Keep this module cheap to import: blueprints import their services
+# lazily inside the views, so a pre-fork worker only pays for Flask here.
+import os
+import sys
+
+if __package__ in (None, ""):
+    # Executed as a script: make the `backend` package importable.
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 from flask import Flask
-from flask_cors import CORS
-
-# === Import Blueprints ===
-from routes.ai_routes import ai_bp          # AI image upload + free-time preview
-from routes.schedule_routes import schedule_bp  # Save free time & match events
-from routes.event_routes import event_bp    # Fetch/recommend events
-
-# === Create Flask App ===
-app = Flask(__name__)
-CORS(app, resources={r"/api/*": {"origins": "*"}})  # Enable CORS for /api/* routes
-
-# === Register Blueprints with prefixes ===
-app.register_blueprint(ai_bp, url_prefix="/api/ai")
-app.register_blueprint(schedule_bp, url_prefix="/api/schedule")
-app.register_blueprint(event_bp, url_prefix="/api/events")
-
-# === Root route (Health Check) ===
-@app.route("/")
-def home():
-    """Simple health check route to confirm backend is live."""
-    return {
-        "message": "✅ betterCorq backend is running",
-        "available_routes": {
-            "POST /api/ai/upload-schedule": "Upload schedule image → AI extract → free time preview",
-            "POST /api/schedule/save-free-time": "Save final user-selected free time",
-            "GET  /api/schedule/generate-matched-events": "Generate events that fit user free time",
-            "GET  /api/events/recommend": "Fetch recommended events (auto-update)"
+
+
+def create_app():
+    """Application factory: build the Flask app and register blueprints."""
+    from dotenv import load_dotenv
+    from flask_cors import CORS
+
+    from backend.utils.paths import BACKEND_DIR
+
+    # === Environment (.env in backend/ or the repo root, not the CWD) ===
+    # Before anything below is imported: modules read their settings
+    # (SECRET_KEY, RATELIMIT_*, ...) from the environment.
+    for env_dir in (BACKEND_DIR, os.path.dirname(BACKEND_DIR)):
+        load_dotenv(os.path.join(env_dir, ".env"))  # never overrides real env vars
+
+    from backend.profiling import init_profiling
+
+    # === Import Blueprints ===
+    from backend.routes.ai_routes import ai_bp          # AI image upload + free-time preview
+    from backend.routes.schedule_routes import schedule_bp  # Save free time & match events
+    from backend.routes.event_routes import event_bp    # Fetch/recommend events
+
+    # === Create Flask App ===
+    app = Flask(__name__)
+    CORS(app, resources={r"/api/*": {"origins": "*"}})  # Enable CORS for /api/* routes
+
+    # === Register Blueprints with prefixes ===
+    app.register_blueprint(ai_bp, url_prefix="/api/ai")
+    app.register_blueprint(schedule_bp, url_prefix="/api/schedule")
+    app.register_blueprint(event_bp, url_prefix="/api/events")
+
+    # === Opt-in profiling (PROFILING_ENABLED=1) ===
+    init_profiling(app)
+
+    # === Root route (Health Check) ===
+    @app.route("/")
+    def home():
+        """Simple health check route to confirm backend is live."""
+        return {
+            "message": "✅ betterCorq backend is running",
+            "available_routes": {
+                "POST /api/ai/upload-schedule": "Upload schedule image → AI extract → free time preview",
+                "POST /api/schedule/save-free-time": "Save final user-selected free time",
+                "GET  /api/schedule/generate-matched-events": "Generate events that fit user free time",
+                "POST /api/schedule/itinerary": "Conflict-free itinerary / conflict report for selected events",
+                "GET  /api/events/recommend": "Fetch recommended events (auto-update)",
+                "GET  /api/events/feed-url": "Calendar subscription URL for the current user",
+                "GET  /api/events/feed/<token>.ics": "Recommended events as an iCalendar feed"
+            }
         }
-    }
+
+    return app
+
+
+def __getattr__(name):
+    # Backward compatibility: `from backend.app import app` builds it on first use.
+    if name == "app":
+        global app
+        app = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 # === Run Flask ===
 if __name__ == "__main__":
-    app.run(debug=True, port=5000)
+    create_app().run(debug=True, port=5000)
@@ -7,14 +7,13 @@ from flask import Blueprint, current_app, jsonify, request
 from flask_sqlalchemy import SQLAlchemy
 from werkzeug.security import generate_password_hash, check_password_hash
 import jwt
-from dotenv import load_dotenv
 
-load_dotenv()
+from backend.ratelimit import ip_key, rate_limit
+from backend.utils.paths import data_path
 
 # --------- Configuration / DB init helpers ---------
 db = SQLAlchemy()
-DEFAULT_DB_PATH = "backend/data/users.db"
-os.makedirs(os.path.dirname(DEFAULT_DB_PATH), exist_ok=True)
+DEFAULT_DB_PATH = data_path("users.db")
 
 def init_auth_db(app, db_path=None):
     """
@@ -23,11 +22,12 @@ def init_auth_db(app, db_path=None):
     """
     if db_path is None:
         db_path = DEFAULT_DB_PATH
+    os.makedirs(os.path.dirname(db_path), exist_ok=True)
 
     app.config.setdefault("SQLALCHEMY_DATABASE_URI", f"sqlite:///{db_path}")
     app.config.setdefault("SQLALCHEMY_TRACK_MODIFICATIONS", False)
-    # Secret for signing tokens (fallback to environment)
-    app.config.setdefault("SECRET_KEY", os.getenv("SECRET_KEY", "dev-secret-placeholder"))
+    # Secret for signing tokens (from the environment; no built-in fallback)
+    app.config.setdefault("SECRET_KEY", os.getenv("SECRET_KEY"))
     # JWT expiration in seconds
     app.config.setdefault("JWT_EXP_SECONDS", int(os.getenv("JWT_EXP_SECONDS", "3600")))
 
@@ -67,6 +67,59 @@ def create_token(payload: dict, expires_seconds: int, secret: str):
 def decode_token(token: str, secret: str):
     return jwt.decode(token, secret, algorithms=["HS256"])
 
+def signing_secret():
+    """
+    SECRET_KEY from the app config or environment, or None if unset.
+    Fail closed: without a configured secret nobody has a user identity
+    (a well-known fallback key would let anyone mint tokens).
+    """
+    return current_app.config.get("SECRET_KEY") or os.getenv("SECRET_KEY") or None
+
+def current_user_id(default="default"):
+    """
+    user_id from a valid 'Bearer <token>' header, else `default`.
+    For routes that also work signed-out (free time, recommendations).
+    """
+    parts = request.headers.get("Authorization", "").split()
+    if len(parts) != 2 or parts[0].lower() != "bearer":
+        return default
+    secret = signing_secret()
+    if secret is None:
+        return default
+    try:
+        user_id = decode_token(parts[1], secret).get("user_id")
+    except jwt.InvalidTokenError:
+        return default
+    return default if user_id is None else user_id
+
+def _feed_serializer():
+    """None when no SECRET_KEY is configured (feeds are then disabled)."""
+    from itsdangerous import URLSafeSerializer
+
+    secret = signing_secret()
+    return None if secret is None else URLSafeSerializer(secret, salt="ics-feed")
+
+def feed_token(user_id):
+    """
+    Signed, non-expiring token for a user's calendar subscription URL
+    (calendar apps cannot send an Authorization header).
+    None if no SECRET_KEY is configured.
+    """
+    serializer = _feed_serializer()
+    return None if serializer is None else serializer.dumps(str(user_id))
+
+def user_id_from_feed_token(token):
+    """user_id encoded in a feed token, or None if the signature is invalid."""
+    from itsdangerous import BadSignature
+
+    serializer = _feed_serializer()
+    if serializer is None:
+        return None
+    try:
+        return serializer.loads(token)
+    except BadSignature:
+        return None
+
 # --------- Auth blueprint & routes ---------
 auth_bp = Blueprint("auth_bp", __name__, url_prefix="/auth")
 
@@ -81,7 +134,9 @@ def token_required(f):
         if len(parts) != 2 or parts[0].lower() != "bearer":
             return jsonify({"error": "Invalid Authorization header"}), 401
         token = parts[1]
-        secret = current_app.config["SECRET_KEY"]
+        secret = signing_secret()
+        if secret is None:
+            return jsonify({"error": "Authentication is not configured"}), 503
         try:
             data = decode_token(token, secret)
             # attach the token payload (e.g., user_id) to request context via kwargs
@@ -94,6 +149,7 @@ def token_required(f):
     return decorated
 
 @auth_bp.route("/signup", methods=["POST"])
+@rate_limit(cost=20, key=ip_key)  # each account is a fresh per-user budget
 def signup():
     """
     Expected JSON body: { "username": "alice", "password": "secret" }
@@ -122,6 +178,7 @@ def signup():
     return jsonify({"message": "user created", "user": new_user.to_dict()}), 201
 
 @auth_bp.route("/login", methods=["POST"])
+@rate_limit(cost=5, key=ip_key)  # slow hash check; a token must not buy more tries
 def login():
     """
     Expected JSON body: { "username": "alice", "password": "secret" }
@@ -138,7 +195,9 @@ def login():
     if not user or not check_password(password, user.password_hash):
         return jsonify({"error": "invalid credentials"}), 401
 
-    secret = current_app.config["SECRET_KEY"]
+    secret = signing_secret()
+    if secret is None:
+        return jsonify({"error": "Authentication is not configured"}), 503
     expires = current_app.config["JWT_EXP_SECONDS"]
     token_payload = {"user_id": user.id, "username": user.username}
     token = create_token(token_payload, expires, secret)
@@ -174,7 +233,9 @@ def refresh():
     if not user:
         return jsonify({"error": "user not found"}), 404
 
-    secret = current_app.config["SECRET_KEY"]
+    secret = signing_secret()
+    if secret is None:
+        return jsonify({"error": "Authentication is not configured"}), 503
     expires = current_app.config["JWT_EXP_SECONDS"]
     token_payload = {"user_id": user.id, "username": user.username}
     new_token = create_token(token_payload, expires, secret)
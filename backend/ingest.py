@@ -0,0 +1,43 @@
+# backend/ingest.py
+# ---------------------------------------------------
+# Ingestion job: fetch the CORQ catalog and publish the shared event
+# snapshot that all worker processes map (see services/snapshot_service.py).
+#
+#   python -m backend.ingest --once      # e.g. from cron
+#   python -m backend.ingest             # loop every --interval seconds
+#
+# Run it more often than EVENTS_MAX_AGE and workers never fetch CORQ themselves.
+# ---------------------------------------------------
+
+import argparse
+import os
+import sys
+import time
+
+if __package__ in (None, ""):
+    # Executed as a script: make the `backend` package importable.
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def main(argv=None):
+    from backend.services.event_service import EVENTS_MAX_AGE, fetch_events_from_corq
+    from backend.services.snapshot_service import current_snapshot
+
+    parser = argparse.ArgumentParser(description="Publish the CORQ event snapshot.")
+    parser.add_argument("--once", action="store_true", help="publish once and exit")
+    parser.add_argument("--interval", type=float, default=max(EVENTS_MAX_AGE / 2, 1.0),
+                        help="seconds between refreshes (default: EVENTS_MAX_AGE / 2)")
+    args = parser.parse_args(argv)
+
+    while True:
+        fetch_events_from_corq()
+        snapshot = current_snapshot()
+        if snapshot is not None:
+            print(f"📦 Snapshot v{snapshot.version}: {len(snapshot)} events")
+        if args.once:
+            return 0 if snapshot is not None else 1
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,221 @@
+# backend/profiling.py
+# ---------------------------------------------------
+# Opt-in request profiling: per-request flame data and a slow-request log.
+#
+# Off unless PROFILING_ENABLED=1; then create_app() installs the hooks.
+# A request is profiled when it carries `X-Profile: <PROFILING_TOKEN>` or
+# falls into the PROFILING_SAMPLE_RATE fraction of traffic (adjustable at
+# runtime via /api/admin/profiling with the same token). Profiled requests
+# run a wall-clock sampling profiler over the threads serving them and
+# append collapsed stacks to PROFILING_DIR/<endpoint>.collapsed:
+#
+#   flamegraph.pl backend/data/profiles/event_bp.get_recommended_events.collapsed > out.svg
+#
+# Services mark their expensive steps with `with stage("name"):`; every
+# request's stage timings go to the slow-request log when it takes longer
+# than SLOW_REQUEST_MS, and to the Server-Timing header when profiled.
+# While disabled, stage() returns a shared no-op and no hooks are installed.
+# ---------------------------------------------------
+
+import contextvars
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import nullcontext
+
+from backend.utils.paths import data_path
+
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "0") == "1"
+PROFILING_TOKEN = os.getenv("PROFILING_TOKEN")  # header/admin trigger is off without it
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "0"))
+PROFILING_INTERVAL_MS = float(os.getenv("PROFILING_INTERVAL_MS", "5"))
+PROFILING_DIR = os.getenv("PROFILING_DIR", data_path("profiles"))
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "1000"))
+SLOW_REQUEST_LOG = os.getenv("SLOW_REQUEST_LOG", data_path("slow_requests.jsonl"))
+
+PROFILE_HEADER = "X-Profile"
+MAX_STACK_DEPTH = 128
+
+_NOOP = nullcontext()
+_trace = contextvars.ContextVar("bettercorq_trace", default=None)
+_write_lock = threading.Lock()
+
+
+class Sampler(threading.Thread):
+    """Samples the stacks of a set of threads every `interval` seconds."""
+
+    def __init__(self, thread_ids, interval):
+        super().__init__(name="profiling-sampler", daemon=True)
+        self.thread_ids = thread_ids  # shared with the Trace; grows as stages run
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frames = sys._current_frames()
+            for ident in list(self.thread_ids):
+                frame = frames.get(ident)
+                if frame is not None:
+                    self.stacks[_collapse(frame)] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        return self.stacks
+
+
+def _collapse(frame):
+    """'outer;...;inner' frame labels for one stack (flamegraph.pl format)."""
+    labels = []
+    while frame is not None and len(labels) < MAX_STACK_DEPTH:
+        code = frame.f_code
+        labels.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{code.co_firstlineno}")
+        frame = frame.f_back
+    return ";".join(reversed(labels)).replace(" ", "_")
+
+
+class Trace:
+    """Stage timings (and optionally a sampler) for one request."""
+
+    def __init__(self, profile):
+        self.started = time.perf_counter()
+        self.stages = []  # (name, ms), in completion order
+        self.threads = {threading.get_ident()}
+        self.sampler = None
+        if profile:
+            self.sampler = Sampler(self.threads, PROFILING_INTERVAL_MS / 1000)
+            self.sampler.start()
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+
+class _Stage:
+    __slots__ = ("trace", "name", "t0")
+
+    def __init__(self, trace, name):
+        self.trace = trace
+        self.name = name
+
+    def __enter__(self):
+        # Async views run on asgiref's loop thread: sample it too.
+        self.trace.threads.add(threading.get_ident())
+        self.t0 = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.trace.stages.append((self.name, (time.perf_counter() - self.t0) * 1000))
+        return False
+
+
+def stage(name):
+    """Time a pipeline step for the current request's trace (no-op otherwise)."""
+    trace = _trace.get() if PROFILING_ENABLED else None
+    return _NOOP if trace is None else _Stage(trace, name)
+
+
+# === Output ===
+def _safe_name(endpoint):
+    return "".join(c if c.isalnum() or c in "._-" else "_" for c in endpoint or "unknown")
+
+
+def write_collapsed(endpoint, stacks):
+    """Append one request's samples to the route's collapsed-stack file."""
+    os.makedirs(PROFILING_DIR, exist_ok=True)
+    path = os.path.join(PROFILING_DIR, f"{_safe_name(endpoint)}.collapsed")
+    lines = "".join(f"{stack} {count}\n" for stack, count in stacks.items())
+    with _write_lock, open(path, "a", encoding="utf-8") as f:
+        f.write(lines)
+    return path
+
+
+def log_slow_request(entry):
+    os.makedirs(os.path.dirname(SLOW_REQUEST_LOG), exist_ok=True)
+    with _write_lock, open(SLOW_REQUEST_LOG, "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    print(f"🐢 Slow request {entry['method']} {entry['path']}: {entry['ms']:.0f} ms {entry['stages']}")
+
+
+def _server_timing(stages):
+    return ", ".join(f"{name};dur={ms:.1f}" for name, ms in stages)
+
+
+# === Flask wiring ===
+def _wants_profile(request):
+    if PROFILING_TOKEN and request.headers.get(PROFILE_HEADER) == PROFILING_TOKEN:
+        return True
+    return PROFILING_SAMPLE_RATE > 0 and random.random() < PROFILING_SAMPLE_RATE
+
+
+def init_profiling(app):
+    """Install the request hooks and admin toggle (only when enabled)."""
+    if not PROFILING_ENABLED:
+        return
+
+    from flask import g, jsonify, request
+
+    @app.before_request
+    def _start_trace():
+        trace = Trace(profile=_wants_profile(request))
+        g.profiling_token = _trace.set(trace)
+
+    @app.after_request
+    def _finish_trace(response):
+        trace = _trace.get()
+        if trace is None:
+            return response
+        ms = trace.elapsed_ms()
+        if trace.sampler is not None:
+            stacks = trace.sampler.stop()
+            trace.sampler = None
+            write_collapsed(request.endpoint, stacks)
+            response.headers["X-Profile-Samples"] = str(sum(stacks.values()))
+            response.headers["Server-Timing"] = _server_timing(trace.stages + [("total", ms)])
+        if SLOW_REQUEST_MS and ms >= SLOW_REQUEST_MS:
+            log_slow_request({
+                "ts": time.time(),
+                "method": request.method,
+                "path": request.path,
+                "endpoint": request.endpoint,
+                "status": response.status_code,
+                "ms": round(ms, 1),
+                "stages": {name: round(t, 1) for name, t in trace.stages},
+            })
+        return response
+
+    @app.teardown_request
+    def _end_trace(exc):
+        trace = _trace.get()
+        if trace is not None and trace.sampler is not None:
+            trace.sampler.stop()  # the view raised before after_request
+        token = g.pop("profiling_token", None)
+        if token is not None:
+            _trace.reset(token)
+
+    @app.route("/api/admin/profiling", methods=["GET", "POST"])
+    def profiling_settings():
+        """
+        Admin toggle (per process). Requires `X-Profile: <PROFILING_TOKEN>`.
+        POST {"sample_rate": 0.01} samples 1% of traffic; 0 turns it off.
+        """
+        global PROFILING_SAMPLE_RATE
+        if not PROFILING_TOKEN or request.headers.get(PROFILE_HEADER) != PROFILING_TOKEN:
+            return jsonify({"error": "Forbidden"}), 403
+        if request.method == "POST":
+            data = request.get_json(silent=True) or {}
+            try:
+                rate = float(data.get("sample_rate", PROFILING_SAMPLE_RATE))
+            except (TypeError, ValueError):
+                return jsonify({"error": "sample_rate must be a number"}), 400
+            if not 0 <= rate <= 1:
+                return jsonify({"error": "sample_rate must be between 0 and 1"}), 400
+            PROFILING_SAMPLE_RATE = rate
+        return jsonify({
+            "sample_rate": PROFILING_SAMPLE_RATE,
+            "slow_request_ms": SLOW_REQUEST_MS,
+            "profiles_dir": PROFILING_DIR,
+        }), 200
@@ -0,0 +1,194 @@
+# backend/ratelimit.py
+# ---------------------------------------------------
+# Token-bucket admission control for expensive endpoints.
+#
+# Each client has a bucket of RATELIMIT_CAPACITY tokens refilled at
+# RATELIMIT_REFILL_PER_SEC: a signed-in user (valid JWT) is keyed by their
+# user_id, an anonymous client by IP. Routes spend tokens according to
+# their cost:
+#
+#   @ai_bp.route("/upload-schedule", methods=["POST"])
+#   @rate_limit(cost=20)
+#   async def upload_schedule(): ...
+#
+# Signed-in users behind one NAT (a campus network) do not share a budget.
+# Minting identities is limited where they are created instead: signup and
+# login are always keyed by IP (`key=ip_key`).
+#
+# Buckets live in process memory by default. Set RATELIMIT_REDIS_URL to
+# share budgets across worker processes (requires the `redis` package).
+# If Redis is unreachable the limiter fails open: requests are admitted
+# and a warning is logged, so a Redis outage does not take the API down.
+# ---------------------------------------------------
+
+import inspect
+import math
+import os
+import threading
+import time
+from functools import wraps
+
+from flask import jsonify, request
+
+RATELIMIT_ENABLED = os.getenv("RATELIMIT_ENABLED", "1") != "0"
+RATELIMIT_CAPACITY = float(os.getenv("RATELIMIT_CAPACITY", "60"))
+RATELIMIT_REFILL_PER_SEC = float(os.getenv("RATELIMIT_REFILL_PER_SEC", "1"))
+RATELIMIT_REDIS_URL = os.getenv("RATELIMIT_REDIS_URL")
+# Only trust X-Forwarded-For when running behind a proxy that sets it.
+RATELIMIT_TRUST_PROXY = os.getenv("RATELIMIT_TRUST_PROXY", "0") == "1"
+
+
+class MemoryBackend:
+    """Per-process buckets: {key: [tokens, last_refill]} behind one lock."""
+
+    max_keys = 100_000
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def consume(self, key, cost, capacity, rate):
+        """Spend `cost` tokens. Returns (allowed, retry_after_seconds)."""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= self.max_keys:
+                    self._prune(now, capacity, rate)
+                bucket = self._buckets[key] = [capacity, now]
+
+            tokens = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+            if tokens >= cost:
+                bucket[0] = tokens - cost
+                return True, 0.0
+            bucket[0] = tokens
+            return False, (cost - tokens) / rate
+
+    def _prune(self, now, capacity, rate):
+        # A bucket that would be full again carries no state worth keeping.
+        full_after = capacity / rate
+        for key in [k for k, (_, ts) in self._buckets.items() if now - ts >= full_after]:
+            del self._buckets[key]
+
+
+class RedisBackend:
+    """Buckets in Redis so every worker process shares the same budgets."""
+
+    # Refill + spend atomically on the server, using the server clock.
+    _SCRIPT = """
+    local capacity = tonumber(ARGV[1])
+    local rate = tonumber(ARGV[2])
+    local cost = tonumber(ARGV[3])
+    local t = redis.call('TIME')
+    local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+    local b = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local tokens = tonumber(b[1]) or capacity
+    local ts = tonumber(b[2]) or now
+    tokens = math.min(capacity, tokens + (now - ts) * rate)
+    local allowed = 0
+    local retry = 0
+    if tokens >= cost then
+        tokens = tokens - cost
+        allowed = 1
+    else
+        retry = (cost - tokens) / rate
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+    return {allowed, tostring(retry)}
+    """
+
+    def __init__(self, url):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("RATELIMIT_REDIS_URL is set but the 'redis' package is not installed")
+        self._script = redis.Redis.from_url(url).register_script(self._SCRIPT)
+        self._errors = redis.RedisError
+
+    def consume(self, key, cost, capacity, rate):
+        try:
+            allowed, retry = self._script(keys=[f"ratelimit:{key}"], args=[capacity, rate, cost])
+        except self._errors as e:
+            print(f"⚠️ Rate limiter unavailable, admitting request ({key}): {e}")
+            return True, 0.0  # fail open
+        return bool(allowed), float(retry)
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = RedisBackend(RATELIMIT_REDIS_URL) if RATELIMIT_REDIS_URL else MemoryBackend()
+    return _backend
+
+
+def ip_key():
+    ip = request.remote_addr
+    if RATELIMIT_TRUST_PROXY and request.headers.get("X-Forwarded-For"):
+        ip = request.headers["X-Forwarded-For"].split(",")[0].strip()
+    return f"ip:{ip}"
+
+
+def client_key():
+    """
+    'user:<id>' for a valid JWT (request.user from token_required, or the
+    Bearer header), else 'ip:<address>'.
+    """
+    payload = getattr(request, "user", None)
+    user_id = payload.get("user_id") if isinstance(payload, dict) else None
+    if user_id is None and request.headers.get("Authorization"):
+        from backend.auth import current_user_id
+        user_id = current_user_id(None)
+    return ip_key() if user_id is None else f"user:{user_id}"
+
+
+def _too_many_requests(retry_after):
+    seconds = max(1, math.ceil(retry_after))
+    response = jsonify({"error": "Too many requests", "retry_after": seconds})
+    response.status_code = 429
+    response.headers["Retry-After"] = str(seconds)
+    return response
+
+
+def rate_limit(cost=1, capacity=None, rate=None, key=client_key):
+    """
+    Decorator: spend `cost` tokens from the caller's bucket before running
+    the view; answer 429 with Retry-After when the bucket is short.
+    `key` names the bucket for the current request (default: client_key).
+    Works on sync and async views.
+    """
+    capacity = RATELIMIT_CAPACITY if capacity is None else capacity
+    rate = RATELIMIT_REFILL_PER_SEC if rate is None else rate
+    if cost > capacity:
+        raise ValueError(f"cost {cost} exceeds bucket capacity {capacity}")
+
+    def check():
+        if not RATELIMIT_ENABLED:
+            return None
+        allowed, retry_after = get_backend().consume(key(), cost, capacity, rate)
+        return None if allowed else _too_many_requests(retry_after)
+
+    def decorator(f):
+        if inspect.iscoroutinefunction(f):
+            @wraps(f)
+            async def decorated(*args, **kwargs):
+                limited = check()
+                if limited is not None:
+                    return limited
+                return await f(*args, **kwargs)
+        else:
+            @wraps(f)
+            def decorated(*args, **kwargs):
+                limited = check()
+                if limited is not None:
+                    return limited
+                return f(*args, **kwargs)
+        return decorated
+    return decorator
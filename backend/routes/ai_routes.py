@@ -1,18 +1,22 @@
 # backend/routes/ai_routes.py
 from flask import Blueprint, request, jsonify
-from services.ai_service import extract_schedule_from_image
-from services.schedule_service import calc_free_time_only
+
+from backend.ratelimit import rate_limit
 
 ai_bp = Blueprint("ai_bp", __name__)
 
 # === 1️⃣ Upload Schedule Image → AI Extract → Free Time Preview ===
 @ai_bp.route("/upload-schedule", methods=["POST"])
-def upload_schedule():
+@rate_limit(cost=20)  # ~60s paid model call
+async def upload_schedule():
     """
     Handle schedule image upload:
     1️⃣ Send image to AI for busy-time extraction
     2️⃣ Convert busy → free time for frontend preview
     """
+    from backend.services.ai_service import extract_schedule_from_image_async
+    from backend.services.schedule_service import calc_free_time_only
+
     try:
         if "file" not in request.files:
             return jsonify({"error": "No file uploaded"}), 400
@@ -24,7 +28,7 @@ def upload_schedule():
         print(f"File received: {file.filename}")
 
         # Step 1: AI extracts busy schedule (Mon, Tue, ...)
-        busy = extract_schedule_from_image(file)
+        busy = await extract_schedule_from_image_async(file)
 
         # Step 2: Convert busy → free time (not saved yet)
         free_time = calc_free_time_only(busy)
@@ -43,17 +47,20 @@ def upload_schedule():
 
 # === 2️⃣ (Optional) Internal route — AI extract only ===
 @ai_bp.route("/ai/extract-schedule", methods=["POST"])
-def extract_schedule_only():
+@rate_limit(cost=20)
+async def extract_schedule_only():
     """
     Internal test route:
     Extract busy schedule from uploaded image (without free-time conversion).
     """
+    from backend.services.ai_service import extract_schedule_from_image_async
+
     try:
         if "file" not in request.files:
             return jsonify({"error": "No file uploaded"}), 400
 
         file = request.files["file"]
-        result = extract_schedule_from_image(file)
+        result = await extract_schedule_from_image_async(file)
 
         return jsonify({
             "message": "Busy schedule extracted successfully",
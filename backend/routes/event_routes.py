@@ -1,16 +1,37 @@
-from flask import Blueprint, jsonify
-from services.schedule_service import generate_matched_events
+from flask import Blueprint, Response, jsonify, request, url_for
+
+from backend.ratelimit import ip_key, rate_limit
 
 event_bp = Blueprint("event_bp", __name__)
 
 @event_bp.route("/api/events/recommend", methods=["GET"])
-def get_recommended_events():
+@rate_limit(cost=2)  # may trigger a live CORQ fetch
+async def get_recommended_events():
     """
     Returns events that fit within the user's saved free time.
     Automatically updates CORQ events before filtering.
+    Optional ?from=YYYY-MM-DD&to=YYYY-MM-DD widens the window (default: next 7 days).
+    Optional ?tolerance=<min> lets events spill past a free block by that much;
+    ?min_free=<min> matches events with at least that many free minutes.
     """
+    from backend.auth import current_user_id
+    from backend.services.schedule_service import generate_matched_events_async
+    from backend.utils.time_utils import parse_date_range, parse_match_options
+
     try:
-        result = generate_matched_events()
+        range_start, range_end = parse_date_range(request.args.get("from"), request.args.get("to"))
+    except ValueError as e:
+        return jsonify({"error": f"Invalid date range: {e}"}), 400
+    try:
+        tolerance, min_free = parse_match_options(request.args.get("tolerance"), request.args.get("min_free"))
+    except ValueError as e:
+        return jsonify({"error": f"Invalid match options: {e}"}), 400
+
+    try:
+        result = await generate_matched_events_async(
+            current_user_id(), range_start, range_end, tolerance, min_free)
+        if "message" in result:  # no free time saved and nothing to derive it from
+            return jsonify(result), 404
         return jsonify({
             "message": "Recommended events generated successfully.",
             "count": result["matched_events_count"],
@@ -18,3 +39,63 @@ def get_recommended_events():
         }), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
+
+
+@event_bp.route("/feed-url", methods=["GET"])
+def get_feed_url():
+    """
+    Calendar subscription URL for the current user (webcal-compatible).
+    Add it to Google Calendar / Apple Calendar / Outlook as "From URL".
+    """
+    from backend.auth import current_user_id, feed_token
+
+    token = feed_token(current_user_id())
+    if token is None:
+        return jsonify({"error": "Calendar feeds are not configured (SECRET_KEY unset)"}), 503
+    url = url_for("event_bp.get_calendar_feed", token=token, _external=True)
+    return jsonify({"url": url}), 200
+
+
+def _feed_key():
+    """
+    Bucket of a feed poll: the user in the feed token. Calendar services
+    poll from a few shared IPs, so an IP bucket would be shared by
+    unrelated subscribers. Invalid tokens fall back to the IP.
+    """
+    from backend.auth import user_id_from_feed_token
+
+    user_id = user_id_from_feed_token(request.view_args.get("token", ""))
+    return ip_key() if user_id is None else f"feed:{user_id}"
+
+
+@event_bp.route("/feed/<token>.ics", methods=["GET"])
+@rate_limit(cost=1, key=_feed_key)  # cheap when cached, but a miss may refresh from CORQ
+async def get_calendar_feed(token):
+    """
+    The user's recommended events as an iCalendar feed.
+    Supports ETag / If-None-Match; large feeds are streamed.
+    """
+    from backend.auth import user_id_from_feed_token
+    from backend.services.event_service import EVENTS_MAX_AGE
+    from backend.services.ics_service import ICS_STREAM_MIN_EVENTS, get_feed_async
+
+    user_id = user_id_from_feed_token(token)
+    if user_id is None:
+        return jsonify({"error": "Invalid feed token"}), 404
+
+    try:
+        feed = await get_feed_async(user_id)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    if feed is None:
+        return jsonify({"error": "No free time saved yet"}), 404
+
+    if request.if_none_match.contains_weak(feed.etag):
+        response = Response(status=304)
+    elif len(feed) >= ICS_STREAM_MIN_EVENTS:
+        response = Response(iter(feed), mimetype="text/calendar")
+    else:
+        response = Response(feed.body(), mimetype="text/calendar")
+    response.set_etag(feed.etag, weak=True)
+    response.headers["Cache-Control"] = f"private, max-age={int(EVENTS_MAX_AGE)}"
+    return response
@@ -1,10 +1,8 @@
 # backend/routes/schedule_routes.py
 
 from flask import Blueprint, jsonify, request
-from services.schedule_service import (
-    save_user_free_time,
-    generate_free_time as generate_matched_events  # ✅ alias로 이름 통일
-)
+
+from backend.ratelimit import rate_limit
 
 
 schedule_bp = Blueprint("schedule_bp", __name__)
@@ -16,28 +14,57 @@ def save_free_time():
     Save the free time schedule selected and adjusted by the user.
     This replaces the old 'update-schedule' logic.
     """
+    from backend.auth import current_user_id
+    from backend.services.schedule_service import save_user_free_time
+
     try:
         data = request.get_json()
         if not data:
             return jsonify({"error": "No free time data received"}), 400
 
-        result = save_user_free_time(data)
+        result = save_user_free_time(data, current_user_id())
+        if "error" in result:
+            return jsonify(result), 500
         return jsonify(result), 200
+    except ValueError as e:
+        return jsonify({"error": f"Invalid free time: {e}"}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
 # === 2️⃣ Match Events Based on Saved Free Time ===
 @schedule_bp.route("/generate-matched-events", methods=["GET"])
-def generate_matched_events_route():
+@rate_limit(cost=2)  # may trigger a live CORQ fetch
+async def generate_matched_events_route():
     """
     1. Load the saved free_time.json
     2. Fetch the latest events from CORQ
     3. Match them against the user's free time
     4. Save and return matched events
+    Optional ?from=YYYY-MM-DD&to=YYYY-MM-DD widens the window (default: next 7 days).
+    Optional ?tolerance=<min> lets events spill past a free block by that much;
+    ?min_free=<min> matches events with at least that many free minutes.
     """
+    from backend.auth import current_user_id
+    from backend.services.schedule_service import (
+        generate_free_time_async as generate_matched_events  # ✅ alias로 이름 통일
+    )
+    from backend.utils.time_utils import parse_date_range, parse_match_options
+
     try:
-        result = generate_matched_events()
+        range_start, range_end = parse_date_range(request.args.get("from"), request.args.get("to"))
+    except ValueError as e:
+        return jsonify({"error": f"Invalid date range: {e}"}), 400
+    try:
+        tolerance, min_free = parse_match_options(request.args.get("tolerance"), request.args.get("min_free"))
+    except ValueError as e:
+        return jsonify({"error": f"Invalid match options: {e}"}), 400
+
+    try:
+        result = await generate_matched_events(
+            current_user_id(), range_start, range_end, tolerance, min_free)
+        if "message" in result:  # no free time saved and nothing to derive it from
+            return jsonify(result), 404
         return jsonify({
             "message": "Events matched successfully.",
             "matched_events_count": result["matched_events_count"],
@@ -45,3 +72,60 @@ def generate_matched_events_route():
         }), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
+
+
+# === 3️⃣ Build a Conflict-Free Itinerary from Selected Events ===
+@schedule_bp.route("/itinerary", methods=["POST"])
+def build_itinerary_route():
+    """
+    Check the user's picked events (frontend `selectedEvents`) against each
+    other and their free time.
+    Expected JSON body:
+      {
+        "events": [{name, start, end, location, organization, weight?}, ...],
+        "mode": "optimize" | "conflicts",     (default "optimize")
+        "travel_buffer": 15,                  (minutes between different locations)
+        "free_time": {...}                    (optional; default: saved free time)
+      }
+    The response's "free_time_applied" is false when the user has no free
+    time at all, so no event was checked against it.
+    """
+    from backend.auth import current_user_id
+    from backend.services.itinerary_service import (
+        DEFAULT_TRAVEL_BUFFER,
+        MAX_CANDIDATES,
+        MAX_TRAVEL_BUFFER,
+        build_itinerary,
+        conflict_report,
+    )
+    from backend.services.schedule_service import load_user_availability
+
+    data = request.get_json(silent=True) or {}
+    events = data.get("events")
+    mode = data.get("mode", "optimize")
+
+    if not isinstance(events, list):
+        return jsonify({"error": "events must be a list"}), 400
+    if len(events) > MAX_CANDIDATES:
+        return jsonify({"error": f"at most {MAX_CANDIDATES} events per request"}), 400
+    if mode not in ("optimize", "conflicts"):
+        return jsonify({"error": "mode must be 'optimize' or 'conflicts'"}), 400
+    try:
+        travel_buffer = int(data.get("travel_buffer", DEFAULT_TRAVEL_BUFFER))
+    except (TypeError, ValueError):
+        return jsonify({"error": "travel_buffer must be a number of minutes"}), 400
+    if not 0 <= travel_buffer <= MAX_TRAVEL_BUFFER:
+        return jsonify({"error": f"travel_buffer must be between 0 and {MAX_TRAVEL_BUFFER} minutes"}), 400
+
+    try:
+        free_time = data.get("free_time") or load_user_availability(current_user_id())
+        if mode == "optimize":
+            result = build_itinerary(events, free_time, travel_buffer)
+        else:
+            result = conflict_report(events, free_time, travel_buffer)
+        result["free_time_applied"] = free_time is not None
+        return jsonify(result), 200
+    except ValueError as e:  # malformed free_time in the body
+        return jsonify({"error": f"Invalid free time: {e}"}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
@@ -1,14 +1,17 @@
 import base64
-import requests
 import os
 import json
-from dotenv import load_dotenv
-
-load_dotenv()
+from backend.services import http_client, upstream
+from backend.utils.paths import DATA_DIR, data_path
 
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
+OPENROUTER_URL = os.getenv("OPENROUTER_URL", "https://openrouter.ai/api/v1/chat/completions")
 
 def extract_schedule_from_image(file):
+    """Sync entry point for extract_schedule_from_image_async()."""
+    return http_client.run_sync(extract_schedule_from_image_async(file))
+
+async def extract_schedule_from_image_async(file):
     """Send a schedule image to OpenRouter (GPT-4o) and get structured busy-time data."""
     print("📤 [AI Service] Starting image extraction process...")
 
@@ -68,11 +71,11 @@ def extract_schedule_from_image(file):
     print("🚀 Sending request to OpenRouter API...")
 
     # === Send request ===
-    response = requests.post(
-        "https://openrouter.ai/api/v1/chat/completions",
+    response = await upstream.OPENROUTER.request(
+        "POST",
+        OPENROUTER_URL,
         headers=headers,
-        json=payload,
-        timeout=60
+        json=payload
     )
 
     print(f"🔁 API responded with status {response.status_code}")
@@ -111,11 +114,9 @@ def extract_schedule_from_image(file):
     print("🧩 Cleaned AI text preview:", ai_text[:200])
 
     # === Define absolute save path ===
-    base_dir = os.path.dirname(__file__)               # → backend/services/
-    data_dir = os.path.abspath(os.path.join(base_dir, "../data"))
-    os.makedirs(data_dir, exist_ok=True)               # ✅ auto-create if not exist
+    os.makedirs(DATA_DIR, exist_ok=True)               # ✅ auto-create if not exist
 
-    save_path = os.path.join(data_dir, "schedule.json")
+    save_path = data_path("schedule.json")
 
     # === Save result ===
     try:
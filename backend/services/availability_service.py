@@ -0,0 +1,388 @@
+# backend/services/availability_service.py
+# ---------------------------------------------------
+# Precomputed availability index per user: weekly template + dated overrides.
+#
+# Built once when the user saves free time, persisted as a compact binary
+# file (merged minute intervals per weekday) and memoized in an in-process
+# LRU. Recommendation requests look it up instead of re-parsing JSON.
+# ---------------------------------------------------
+
+import hashlib
+import os
+import re
+import struct
+import sys
+import threading
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+from datetime import date
+
+from backend.utils.paths import data_path
+from backend.utils.time_utils import to_hhmm
+
+DAY_NAMES = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+AVAILABILITY_DIR = data_path("availability")
+AVAILABILITY_CACHE_SIZE = int(os.getenv("AVAILABILITY_CACHE_SIZE", "256"))
+
+# File layout (v2): magic, format version, interval count per weekday,
+# number of dated overrides; then the weekly (start, end) minute pairs
+# Mon → Sun, the override dates (uint32 ordinals), their interval counts
+# and their pairs. All little-endian. v1 files (weekly only) still load.
+_MAGIC = b"BCAV"
+_FORMAT_VERSION = 2
+_HEADER_V1 = struct.Struct("<4sB7H")
+_HEADER = struct.Struct("<4sB7HI")
+
+# The calendar grid saves {"from": first cell, "to": last cell} in
+# 30-minute cells, so a "to" of 21:30 means free until 22:00.
+GRID_SLOT_MINUTES = 30
+
+MINUTES_PER_DAY = 24 * 60
+
+
+_HHMM = re.compile(r"([01][0-9]|2[0-4]):([0-5][0-9])")
+
+
+def _clock(value):
+    """Validated 'HH:MM' (00:00–24:00) → minutes; ValueError otherwise."""
+    match = _HHMM.fullmatch(value) if isinstance(value, str) else None
+    if match is None or (match.group(1) == "24" and match.group(2) != "00"):
+        raise ValueError(f"invalid time {value!r} (expected HH:MM between 00:00 and 24:00)")
+    return int(match.group(1)) * 60 + int(match.group(2))
+
+
+def _day_ordinal(day):
+    """None for a weekday key, the date ordinal for an ISO date; ValueError otherwise."""
+    if day in DAY_NAMES:
+        return None
+    try:
+        return date.fromisoformat(day).toordinal()
+    except (TypeError, ValueError):
+        raise ValueError(f"invalid day {day!r} (expected one of {', '.join(DAY_NAMES)} or YYYY-MM-DD)")
+
+
+def _interval(start, end, day):
+    if end <= start:
+        raise ValueError(f"empty or reversed interval on {day}: {to_hhmm(start)}–{to_hhmm(end)}")
+    return start, end
+
+
+def absolute_minute(dt):
+    """Minutes since 0001-01-01 for a naive datetime; sortable across days."""
+    return dt.toordinal() * MINUTES_PER_DAY + dt.hour * 60 + dt.minute
+
+
+def merge_intervals(intervals):
+    """Sort and merge overlapping/adjacent (start, end) minute pairs."""
+    merged = []
+    for start, end in sorted(intervals):
+        if end <= start:
+            continue
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def _to_arrays(intervals):
+    merged = merge_intervals(intervals)
+    return array("H", (s for s, _ in merged)), array("H", (e for _, e in merged))
+
+
+def _read(raw, offset, typecode, n):
+    values = array(typecode)
+    end = offset + n * values.itemsize
+    values.frombytes(raw[offset:end])
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values, end
+
+
+def _write(typecode, values):
+    values = array(typecode, values)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values.tobytes()
+
+
+class AvailabilityIndex:
+    """
+    Free time as a weekly template plus dated overrides.
+
+    starts[d] / ends[d] are merged, sorted uint16 minute arrays for weekday d
+    (Mon=0). dated maps a date ordinal to its own (starts, ends); a dated
+    entry replaces the template for that day, and an empty one marks the
+    day as not free.
+    """
+
+    __slots__ = ("starts", "ends", "dated", "_digest")
+
+    def __init__(self, starts, ends, dated=None):
+        self.starts = starts
+        self.ends = ends
+        self.dated = dated or {}
+        self._digest = None
+
+    @classmethod
+    def from_free_time(cls, free_time):
+        """
+        Build from saved free time. Accepts
+        - a dict keyed by weekday and/or ISO date:
+          {'Mon': [['08:00','09:30']], '2025-11-11': [['14:00','18:00']]}
+        - the calendar grid's list:
+          [{'day': 'Mon' | '2025-11-11', 'from': '08:00', 'to': '12:00'}, ...]
+
+        Raises:
+            ValueError: on an unknown day key, a time outside 00:00–24:00,
+                an empty/reversed interval or any other shape
+        """
+        weekly = {day: [] for day in DAY_NAMES}
+        dated = {}
+
+        def add(day, pairs):
+            ordinal = _day_ordinal(day)
+            if ordinal is None:
+                weekly[day].extend(pairs)
+            else:
+                dated.setdefault(ordinal, []).extend(pairs)
+
+        if isinstance(free_time, dict):
+            for day, intervals in free_time.items():
+                if not isinstance(intervals, list) or not all(
+                        isinstance(p, (list, tuple)) and len(p) == 2 for p in intervals):
+                    raise ValueError(f"free time for {day!r} must be a list of [start, end] pairs")
+                add(day, [_interval(_clock(s), _clock(e), day) for s, e in intervals])
+        elif isinstance(free_time, list):
+            for entry in free_time:
+                if not isinstance(entry, dict) or not {"day", "from", "to"} <= entry.keys():
+                    raise ValueError("grid entries must be objects with 'day', 'from' and 'to'")
+                day = entry["day"]
+                start, end = _clock(entry["from"]), _clock(entry["to"]) + GRID_SLOT_MINUTES
+                if end > MINUTES_PER_DAY:
+                    raise ValueError(f"grid cell {entry['to']!r} on {day} runs past midnight")
+                add(day, [_interval(start, end, day)])
+        else:
+            raise ValueError("free time must be a weekday/date dict or a list of grid cells")
+
+        starts, ends = zip(*(_to_arrays(weekly[day]) for day in DAY_NAMES))
+        return cls(list(starts), list(ends),
+                   {ordinal: _to_arrays(pairs) for ordinal, pairs in dated.items()})
+
+    def intervals_on(self, day):
+        """(starts, ends) minute arrays in effect on a given date."""
+        override = self.dated.get(day.toordinal())
+        if override is not None:
+            return override
+        weekday = day.weekday()
+        return self.starts[weekday], self.ends[weekday]
+
+    def calendar(self, first, last, pad=0):
+        """
+        Expand into a CalendarRange for events starting on first..last
+        (inclusive; the day after `last` is included for events that run
+        past midnight), with every free interval widened by `pad` minutes
+        on both sides.
+        """
+        return CalendarRange(self, first, last, pad)
+
+    def to_free_time(self):
+        """Back to the dict shape (for API responses): weekdays, then dated overrides."""
+        free_time = {
+            day: [[to_hhmm(s), to_hhmm(e)] for s, e in zip(self.starts[d], self.ends[d])]
+            for d, day in enumerate(DAY_NAMES)
+        }
+        for ordinal in sorted(self.dated):
+            starts, ends = self.dated[ordinal]
+            free_time[date.fromordinal(ordinal).isoformat()] = [
+                [to_hhmm(s), to_hhmm(e)] for s, e in zip(starts, ends)
+            ]
+        return free_time
+
+    def digest(self):
+        """Content hash of the free time (cache key for derived data); computed once."""
+        if self._digest is None:
+            self._digest = hashlib.sha1(self.to_bytes()).hexdigest()
+        return self._digest
+
+    def to_bytes(self):
+        ordinals = sorted(self.dated)
+        weekly = [v for s, e in zip(self.starts, self.ends) for pair in zip(s, e) for v in pair]
+        dated = [v for o in ordinals for pair in zip(*self.dated[o]) for v in pair]
+        return b"".join([
+            _HEADER.pack(_MAGIC, _FORMAT_VERSION, *(len(s) for s in self.starts), len(ordinals)),
+            _write("H", weekly),
+            _write("I", ordinals),
+            _write("H", (len(self.dated[o][0]) for o in ordinals)),
+            _write("H", dated),
+        ])
+
+    @classmethod
+    def from_bytes(cls, raw):
+        magic, version = raw[:4], raw[4]
+        if magic != _MAGIC or version not in (1, _FORMAT_VERSION):
+            raise ValueError("Not a betterCorq availability index")
+        if version == 1:
+            _, _, *counts = _HEADER_V1.unpack_from(raw)
+            n_dates, offset = 0, _HEADER_V1.size
+        else:
+            _, _, *counts, n_dates = _HEADER.unpack_from(raw)
+            offset = _HEADER.size
+
+        weekly, offset = _read(raw, offset, "H", 2 * sum(counts))
+        ordinals, offset = _read(raw, offset, "I", n_dates)
+        date_counts, offset = _read(raw, offset, "H", n_dates)
+        dated_pairs, offset = _read(raw, offset, "H", 2 * sum(date_counts))
+
+        starts, ends, pos = [], [], 0
+        for n in counts:
+            starts.append(weekly[pos:pos + 2 * n:2])
+            ends.append(weekly[pos + 1:pos + 2 * n:2])
+            pos += 2 * n
+
+        dated, pos = {}, 0
+        for ordinal, n in zip(ordinals, date_counts):
+            dated[ordinal] = (dated_pairs[pos:pos + 2 * n:2], dated_pairs[pos + 1:pos + 2 * n:2])
+            pos += 2 * n
+        return cls(starts, ends, dated)
+
+
+class CalendarRange:
+    """
+    Free time over a date range as one sorted array of absolute-minute
+    intervals (see absolute_minute). Built once per request in O(days · k);
+    each lookup is a binary search, so matching N events is O(N log M).
+
+    `pad` is the matching tolerance: fits() lets an event spill that many
+    minutes past either edge of one free block. Blocks are not merged after
+    padding, so an event never matches across the busy gap between two
+    blocks. Padded starts and ends are both still sorted, so the candidate
+    block is one binary search and one end check.
+    `free_before[i]` is the total free time in intervals 0..i-1, which makes
+    "how many minutes of [start, end) are free" two binary searches.
+    """
+
+    __slots__ = ("first", "last", "pad", "starts", "ends", "free_before")
+
+    def __init__(self, index, first, last, pad=0):
+        self.first = first
+        self.last = last
+        self.pad = pad
+        self.starts = array("q")
+        self.ends = array("q")
+
+        # Padding can reach into the neighbouring days, and an event starting
+        # on `last` may run past midnight: cover the day after it too
+        # (within date's range).
+        spill = -(-pad // MINUTES_PER_DAY)
+        lo = max(first.toordinal() - spill, 1)
+        hi = min(last.toordinal() + 1 + spill, date.max.toordinal())
+        for ordinal in range(lo, hi + 1):
+            base = ordinal * MINUTES_PER_DAY
+            day_starts, day_ends = index.intervals_on(date.fromordinal(ordinal))
+            for s, e in zip(day_starts, day_ends):
+                s, e = base + s, base + e
+                # Intervals that touch across midnight become one.
+                if self.ends and self.ends[-1] >= s:
+                    self.ends[-1] = max(self.ends[-1], e)
+                else:
+                    self.starts.append(s)
+                    self.ends.append(e)
+
+        self.free_before = array("q", [0])
+        for s, e in zip(self.starts, self.ends):
+            self.free_before.append(self.free_before[-1] + e - s)
+
+    def fits(self, start, end):
+        """
+        True if [start, end) absolute minutes lies inside one free interval
+        widened by `pad` on both sides. The last block starting (padded) at
+        or before `start` also has the latest end among such blocks.
+        """
+        i = bisect_right(self.starts, start + self.pad) - 1
+        return i >= 0 and self.ends[i] + self.pad >= end
+
+    def _free_until(self, t):
+        i = bisect_right(self.starts, t) - 1
+        if i < 0:
+            return 0
+        return self.free_before[i] + min(t, self.ends[i]) - self.starts[i]
+
+    def free_minutes(self, start, end):
+        """Minutes of [start, end) that fall inside free intervals (unpadded)."""
+        return self._free_until(end) - self._free_until(start)
+
+    def __len__(self):
+        return len(self.starts)
+
+
+class LRUCache:
+    """Small thread-safe LRU keyed by user (also used for ICS feeds)."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+
+_cache = LRUCache(AVAILABILITY_CACHE_SIZE)
+
+
+def user_key(user_id):
+    """Filesystem-safe key for a user id (JWT user_id or 'default')."""
+    return re.sub(r"[^A-Za-z0-9_-]", "_", str(user_id)) or "default"
+
+
+def index_path(user_id):
+    return os.path.join(AVAILABILITY_DIR, f"{user_key(user_id)}.bin")
+
+
+def save_availability(user_id, free_time):
+    """Build the user's index, persist it atomically and refresh the cache."""
+    index = AvailabilityIndex.from_free_time(free_time)
+    path = index_path(user_id)
+    os.makedirs(AVAILABILITY_DIR, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(index.to_bytes())
+    os.replace(tmp_path, path)
+    _cache.put(user_key(user_id), (os.stat(path).st_mtime_ns, index))
+    return index
+
+
+def load_availability(user_id):
+    """
+    Return the user's AvailabilityIndex, or None if they never saved free time.
+    Served from the LRU; the mtime check picks up saves made by other workers.
+    """
+    key = user_key(user_id)
+    path = index_path(user_id)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+    cached = _cache.get(key)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    with open(path, "rb") as f:
+        index = AvailabilityIndex.from_bytes(f.read())
+    _cache.put(key, (mtime, index))
+    return index
@@ -1,10 +1,20 @@
 import json
 import os
-import requests
+from bisect import bisect_left, bisect_right
 from datetime import datetime, timedelta
 import pytz
+from backend.profiling import stage
+from backend.services import http_client, snapshot_service, upstream
+from backend.services.availability_service import AvailabilityIndex, absolute_minute
+from backend.services.snapshot_service import EventSnapshot
+from backend.utils.paths import data_path
+from backend.utils.time_utils import parse_event_span
 
-EVENTS_PATH = "backend/data/events_est.json"
+EVENTS_PATH = data_path("events_est.json")
+# How long a published snapshot is served before a request refreshes it.
+EVENTS_MAX_AGE = float(os.getenv("EVENTS_MAX_AGE", "60"))
+
+_corq_flight = upstream.SingleFlight()
 
 def load_json(path):
     if not os.path.exists(path):
@@ -12,91 +22,205 @@ def load_json(path):
     with open(path, "r", encoding="utf-8") as f:
         return json.load(f)
 
-def str_to_time(s):
-    return datetime.strptime(s, "%H:%M").time()
-
-# === Fetch latest CORQ events ===
-def fetch_events_from_corq():
-    """Fetch current events from CORQ (Stony Brook Engage API) and save locally."""
-    url = "https://stonybrook.campuslabs.com/engage/api/discovery/event/search?endsAfter=2025-11-06T00:00:00Z&take=200&sort=startsOn&order=ascending"
-    headers = {
-        "accept": "application/json",
-        "user-agent": "Mozilla/5.0",
-        "referer": "https://stonybrook.campuslabs.com/engage/"
-    }
+CORQ_EVENTS_URL = os.getenv(
+    "CORQ_EVENTS_URL",
+    "https://stonybrook.campuslabs.com/engage/api/discovery/event/search?endsAfter=2025-11-06T00:00:00Z&take=200&sort=startsOn&order=ascending"
+)
+CORQ_HEADERS = {
+    "accept": "application/json",
+    "user-agent": "Mozilla/5.0",
+    "referer": "https://stonybrook.campuslabs.com/engage/"
+}
+
+def convert_events(events):
+    """
+    Normalize raw CORQ events (UTC ISO timestamps) into the EST shape we store.
+    Events without parseable start/end timestamps are skipped.
+    """
     eastern = pytz.timezone("US/Eastern")
+    converted = []
+    skipped = 0
+    for e in events:
+        if not isinstance(e, dict):
+            skipped += 1
+            continue
+        start_utc = e.get("startsOn")
+        end_utc = e.get("endsOn")
 
-    try:
-        res = requests.get(url, headers=headers)
-        if res.status_code != 200:
-            print(f"❌ Failed to fetch data: {res.status_code}")
-            return []
-
-        data = res.json()
-        events = data.get("value", [])
-        print(f"✅ {len(events)} events fetched from CORQ")
-
-        converted = []
-        for e in events:
-            start_utc = e.get("startsOn")
-            end_utc = e.get("endsOn")
-
-            if not start_utc or not end_utc:
-                continue
+        if not start_utc or not end_utc:
+            continue
 
+        try:
             start_dt = datetime.fromisoformat(start_utc.replace("Z", "+00:00")).astimezone(eastern)
             end_dt = datetime.fromisoformat(end_utc.replace("Z", "+00:00")).astimezone(eastern)
+        except (AttributeError, TypeError, ValueError, OverflowError):
+            skipped += 1
+            continue
 
-            converted.append({
-                "name": e.get("name"),
-                "start": start_dt.strftime("%Y-%m-%d %I:%M %p EST"),
-                "end": end_dt.strftime("%I:%M %p EST"),
-                "location": e.get("location"),
-                "organization": e.get("organizationName")
-            })
-
-        with open(EVENTS_PATH, "w", encoding="utf-8") as f:
-            json.dump(converted, f, ensure_ascii=False, indent=2)
+        converted.append({
+            "id": e.get("id"),  # Engage event id (stable; used as the iCalendar UID)
+            "name": e.get("name"),
+            "start": start_dt.strftime("%Y-%m-%d %I:%M %p EST"),
+            "end": end_dt.strftime("%I:%M %p EST"),
+            "location": e.get("location"),
+            "organization": e.get("organizationName")
+        })
+    if skipped:
+        print(f"⚠️ Skipped {skipped} CORQ events with malformed data")
+    return converted
+
+def load_last_good_events():
+    """Last snapshot successfully fetched from CORQ (or [] if we never had one)."""
+    events = load_json(EVENTS_PATH)
+    return events if isinstance(events, list) else []
+
+def save_events_snapshot(events):
+    """Atomically replace the cached snapshot so readers never see a partial file."""
+    os.makedirs(os.path.dirname(EVENTS_PATH), exist_ok=True)
+    tmp_path = f"{EVENTS_PATH}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(events, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, EVENTS_PATH)
+
+def _corq_events(res):
+    """The raw event list of a CORQ response; UpstreamError if it has none."""
+    if res.status_code != 200:
+        raise upstream.UpstreamError(f"corq: HTTP {res.status_code}")
+    try:
+        payload = res.json()
+    except ValueError as e:
+        raise upstream.UpstreamError(f"corq: invalid JSON ({e})")
+    events = payload.get("value") if isinstance(payload, dict) else None
+    if not isinstance(events, list):
+        raise upstream.UpstreamError("corq: unexpected payload (no 'value' list)")
+    return events
+
+async def _refresh_events_from_corq():
+    res = await upstream.CORQ.request("GET", CORQ_EVENTS_URL, headers=CORQ_HEADERS)
+    try:
+        events = _corq_events(res)
+        print(f"✅ {len(events)} events fetched from CORQ")
+        converted = convert_events(events)
+        if events and not converted:
+            raise upstream.UpstreamError(f"corq: none of {len(events)} events could be parsed")
+    except upstream.UpstreamError:
+        # The call went through but the answer is unusable: count it against
+        # the circuit, and keep serving the last good snapshot.
+        upstream.CORQ.breaker.record_failure()
+        raise
+
+    save_events_snapshot(converted)
+    version = snapshot_service.publish_snapshot(converted)
+    print(f"💾 Saved {len(converted)} events → {EVENTS_PATH} (snapshot v{version})")
+    return converted
 
-        print(f"💾 Saved {len(converted)} events → {EVENTS_PATH}")
-        return converted
+# === Fetch latest CORQ events ===
+async def fetch_events_from_corq_async():
+    """
+    Fetch current events from CORQ (Stony Brook Engage API) and save locally.
+    Concurrent callers share one upstream request; if CORQ is failing (or its
+    circuit is open) the last good snapshot is served instead of [].
+    """
+    try:
+        with stage("fetch_events_from_corq"):
+            return await _corq_flight.do("events", _refresh_events_from_corq)
+    except upstream.UpstreamError as e:
+        events = load_last_good_events()
+        print(f"⚠️ CORQ unavailable ({e}); serving last good snapshot ({len(events)} events)")
+        return events
 
-    except Exception as e:
-        print(f"⚠️ Error while fetching events: {e}")
-        return []
+def fetch_events_from_corq():
+    """Sync entry point for fetch_events_from_corq_async()."""
+    return http_client.run_sync(fetch_events_from_corq_async())
+
+async def load_events_snapshot_async():
+    """
+    The shared memory-mapped event snapshot used for matching.
+    Refreshed from CORQ when older than EVENTS_MAX_AGE — by one worker
+    process at a time; the others keep serving the current version.
+    Returns None only if no snapshot could ever be published.
+    """
+    snapshot = snapshot_service.current_snapshot()
+    if snapshot is not None and snapshot.age() < EVENTS_MAX_AGE:
+        return snapshot
+
+    with snapshot_service.refresh_lock() as acquired:
+        if acquired or snapshot is None:
+            await fetch_events_from_corq_async()
+    return snapshot_service.current_snapshot() or snapshot
+
+def _event_matcher(calendar, min_free):
+    """
+    Per-request predicate on an event's (start, end) absolute minutes.
+    Full containment by default; with min_free, at least that many minutes
+    of the event must be free (events shorter than that must fit entirely).
+    """
+    if not min_free:
+        return calendar.fits
+
+    def matches(start, end):
+        if end - start <= min_free:
+            return calendar.fits(start, end)
+        return calendar.free_minutes(start, end) >= min_free
+    return matches
+
+def _filter_snapshot(snapshot, matches, start_range, end_range):
+    """Snapshot path: rows are sorted by start, times are precomputed minutes."""
+    lo = absolute_minute(start_range)
+    if start_range.second or start_range.microsecond:
+        lo += 1
+    hi = absolute_minute(end_range)
+
+    starts, ends = snapshot.starts, snapshot.ends
+    first = bisect_left(starts, lo)
+    last = bisect_right(starts, hi)
+    return [snapshot.event(i) for i in range(first, last) if matches(starts[i], ends[i])]
 
 # === Filter events based on Free Time ===
-def filter_events_by_free_time(events, free_time):
-    """Return events that fit into user's free time during the next 7 days."""
+def filter_events_by_free_time(events, free_time, range_start=None, range_end=None,
+                               tolerance=0, min_free=None):
+    """
+    Return events that fit into user's free time between range_start and
+    range_end (naive EST datetimes; default: now → 7 days later, 22:00).
+    `free_time` is an AvailabilityIndex or any shape it accepts
+    (weekday- or date-keyed dict, calendar grid list).
+    `events` is a list of event dicts or the shared EventSnapshot.
+
+    tolerance: minutes an event may spill past either edge of a free block
+        (utils.time_utils.is_within_tolerance, applied to the whole event).
+    min_free: partial-overlap mode — match when at least this many minutes
+        of the event are free.
+    Both are applied once to the free intervals, not per event.
+    """
+    if not isinstance(free_time, AvailabilityIndex):
+        free_time = AvailabilityIndex.from_free_time(free_time)
+
+    # Event times are naive EST wall-clock; compare against the same.
     est = pytz.timezone("US/Eastern")
-    now = datetime.now(est)
-    end_range = (now + timedelta(days=7)).replace(hour=22, minute=0, second=0, microsecond=0)
+    now = datetime.now(est).replace(tzinfo=None)
+    start_range = range_start or now
+    end_range = range_end or (start_range + timedelta(days=7)).replace(hour=22, minute=0, second=0, microsecond=0)
 
-    matched = []
-    weekday_map = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+    calendar = free_time.calendar(start_range.date(), end_range.date(), pad=tolerance)
+    matches = _event_matcher(calendar, min_free)
 
-    for e in events:
-        start_str = e.get("start")
-        end_str = e.get("end")
+    if isinstance(events, EventSnapshot):
+        matched = _filter_snapshot(events, matches, start_range, end_range)
+        print(f"✅ Found {len(matched)} available events.")
+        return matched
 
+    matched = []
+    for e in events:
         try:
-            start_dt = datetime.strptime(start_str, "%Y-%m-%d %I:%M %p EST")
-            end_dt = datetime.strptime(end_str, "%I:%M %p EST")
-            end_dt = start_dt.replace(hour=end_dt.hour, minute=end_dt.minute)
-        except Exception:
+            start_dt, end_dt = parse_event_span(e.get("start"), e.get("end"))
+        except (TypeError, ValueError):
             continue
 
-        if not (now <= start_dt <= end_range):
+        if not (start_range <= start_dt <= end_range):
             continue
 
-        weekday = weekday_map[start_dt.weekday()]
-        event_start, event_end = start_dt.time(), end_dt.time()
-
-        for interval in free_time.get(weekday, []):
-            free_start, free_end = str_to_time(interval[0]), str_to_time(interval[1])
-            if free_start <= event_start and event_end <= free_end:
-                matched.append(e)
-                break
+        if matches(absolute_minute(start_dt), absolute_minute(end_dt)):
+            matched.append(e)
 
     print(f"✅ Found {len(matched)} available events.")
     return matched
@@ -0,0 +1,111 @@
+# backend/services/http_client.py
+# ---------------------------------------------------
+# Shared async HTTP client for upstream calls (CORQ, OpenRouter).
+#
+# A single httpx.AsyncClient lives on a dedicated background event loop,
+# so every request handler — sync view or Flask async view, on any worker
+# thread — shares one connection pool and one set of timeouts. In-flight calls are capped
+# per upstream (`limit_key`), so a slow upstream cannot use up another's
+# slots.
+# ---------------------------------------------------
+
+import asyncio
+import os
+import threading
+
+import httpx
+
+UPSTREAM_TIMEOUT = float(os.getenv("UPSTREAM_TIMEOUT", "15"))
+UPSTREAM_CONNECT_TIMEOUT = float(os.getenv("UPSTREAM_CONNECT_TIMEOUT", "5"))
+UPSTREAM_MAX_CONNECTIONS = int(os.getenv("UPSTREAM_MAX_CONNECTIONS", "50"))
+UPSTREAM_MAX_KEEPALIVE = int(os.getenv("UPSTREAM_MAX_KEEPALIVE", "20"))
+UPSTREAM_CONCURRENCY = int(os.getenv("UPSTREAM_CONCURRENCY", "32"))  # default per-upstream cap
+
+_lock = threading.Lock()
+_loop = None
+_client = None
+_semaphores = {}  # limit_key → asyncio.Semaphore, touched only on the loop thread
+
+
+def _start_loop():
+    """Start the background event loop that owns the shared client."""
+    global _loop, _client
+
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+
+    def run():
+        asyncio.set_event_loop(loop)
+        loop.call_soon(ready.set)
+        loop.run_forever()
+
+    threading.Thread(target=run, name="upstream-loop", daemon=True).start()
+    ready.wait()
+
+    async def build():
+        return httpx.AsyncClient(
+            timeout=httpx.Timeout(UPSTREAM_TIMEOUT, connect=UPSTREAM_CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=UPSTREAM_MAX_CONNECTIONS,
+                max_keepalive_connections=UPSTREAM_MAX_KEEPALIVE,
+            ),
+        )
+
+    _client = asyncio.run_coroutine_threadsafe(build(), loop).result()
+    _loop = loop
+
+
+def _get_loop():
+    if _loop is None:
+        with _lock:
+            if _loop is None:
+                _start_loop()
+    return _loop
+
+
+def _reset_after_fork():
+    """A forked worker must not reuse the parent's loop thread or sockets."""
+    global _lock, _loop, _client, _semaphores
+    _lock = threading.Lock()
+    _loop = _client = None
+    _semaphores = {}
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+async def _send(method, url, limit_key, limit, **kwargs):
+    semaphore = _semaphores.get(limit_key)
+    if semaphore is None:
+        semaphore = _semaphores[limit_key] = asyncio.Semaphore(limit or UPSTREAM_CONCURRENCY)
+    async with semaphore:
+        return await _client.request(method, url, **kwargs)
+
+
+async def request(method, url, limit_key="default", limit=None, **kwargs):
+    """
+    Send an HTTP request through the shared client, holding one of `limit`
+    slots (default UPSTREAM_CONCURRENCY) of the `limit_key` pool.
+    Safe to await from any event loop (e.g. the per-request loops of Flask
+    async views); cancelling the await also cancels the queued or in-flight call.
+    """
+    loop = _get_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+
+    call = _send(method, url, limit_key, limit, **kwargs)
+    if running is loop:
+        return await call
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(call, loop))
+
+
+def run_sync(coro):
+    """
+    Run an async service function from sync code (CLI tools, sync views).
+    Parsing and file I/O stay on the calling thread; only the network
+    round-trips are handed to the shared client.
+    """
+    return asyncio.run(coro)
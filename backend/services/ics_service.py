@@ -0,0 +1,201 @@
+# backend/services/ics_service.py
+# ---------------------------------------------------
+# Per-user iCalendar (.ics) subscription feeds of recommended events.
+#
+# A feed is the user's matched events over the next ICS_FEED_DAYS days,
+# one VEVENT per event with the Engage id as its UID. Feeds are cached
+# per user and keyed by (free-time digest, snapshot version, window):
+# - same key           → the cached feed is served as is (no matching)
+# - key changed        → events are re-matched, but VEVENTs of events
+#                        that did not change are reused, not re-rendered
+# The ETag is derived from the events' content, so a rebuild that ends
+# up with the same events still answers conditional GETs with 304.
+# ---------------------------------------------------
+
+import hashlib
+import os
+import time
+from datetime import datetime, timedelta
+
+import pytz
+
+from backend.services.availability_service import LRUCache
+from backend.services.event_service import (
+    filter_events_by_free_time,
+    load_events_snapshot_async,
+    load_last_good_events,
+)
+from backend.services.schedule_service import load_user_availability
+from backend.utils.time_utils import parse_event_span
+
+ICS_FEED_DAYS = int(os.getenv("ICS_FEED_DAYS", "30"))
+ICS_FEED_CACHE_SIZE = int(os.getenv("ICS_FEED_CACHE_SIZE", "1024"))
+# Feeds with at least this many events are streamed instead of joined.
+ICS_STREAM_MIN_EVENTS = int(os.getenv("ICS_STREAM_MIN_EVENTS", "200"))
+
+ENGAGE_EVENT_URL = "https://stonybrook.campuslabs.com/engage/event/{id}"
+PRODID = "-//betterCorq//Recommended Events//EN"
+
+_EASTERN = pytz.timezone("US/Eastern")
+
+_HEADER = (
+    "BEGIN:VCALENDAR\r\n"
+    "VERSION:2.0\r\n"
+    f"PRODID:{PRODID}\r\n"
+    "CALSCALE:GREGORIAN\r\n"
+    "METHOD:PUBLISH\r\n"
+    "X-WR-CALNAME:betterCorq recommendations\r\n"
+).encode("utf-8")
+_FOOTER = b"END:VCALENDAR\r\n"
+
+
+# === iCalendar formatting (RFC 5545) ===
+def _escape(text):
+    return (str(text).replace("\\", "\\\\").replace(";", "\\;")
+            .replace(",", "\\,").replace("\r\n", "\\n").replace("\n", "\\n"))
+
+
+def _fold(line):
+    """Fold a content line at 75 octets without splitting UTF-8 sequences."""
+    raw = line.encode("utf-8")
+    if len(raw) <= 75:
+        return raw + b"\r\n"
+    parts, limit = [], 75
+    while raw:
+        cut = min(limit, len(raw))
+        while cut < len(raw) and (raw[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(raw[:cut])
+        raw = raw[cut:]
+        limit = 74  # continuation lines start with a space
+    return b"\r\n ".join(parts) + b"\r\n"
+
+
+def _utc(dt):
+    """Naive EST wall-clock → 'YYYYMMDDTHHMMSSZ'."""
+    return _EASTERN.localize(dt).astimezone(pytz.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def event_uid(event):
+    """Stable UID: the Engage id, else a hash of name + start (older snapshots)."""
+    if event.get("id"):
+        return f"engage-{event['id']}@bettercorq"
+    digest = hashlib.sha1(f"{event.get('name')}|{event.get('start')}".encode("utf-8")).hexdigest()
+    return f"event-{digest[:16]}@bettercorq"
+
+
+def render_vevent(event, dtstamp):
+    """One VEVENT as folded CRLF bytes."""
+    start_dt, end_dt = parse_event_span(event.get("start"), event.get("end"))
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:{event_uid(event)}",
+        f"DTSTAMP:{dtstamp}",
+        f"DTSTART:{_utc(start_dt)}",
+        f"DTEND:{_utc(end_dt)}",
+        f"SUMMARY:{_escape(event.get('name') or 'Untitled event')}",
+    ]
+    if event.get("location"):
+        lines.append(f"LOCATION:{_escape(event['location'])}")
+    if event.get("organization"):
+        lines.append(f"DESCRIPTION:{_escape('Hosted by ' + event['organization'])}")
+    if event.get("id"):
+        lines.append(f"URL:{ENGAGE_EVENT_URL.format(id=event['id'])}")
+    lines.append("END:VEVENT")
+    return b"".join(_fold(line) for line in lines)
+
+
+# === Feeds ===
+class Feed:
+    """A rendered feed: VCALENDAR header, cached VEVENT chunks, footer."""
+
+    __slots__ = ("key", "etag", "vevents", "order", "_body")
+
+    def __init__(self, key, vevents, order):
+        self.key = key
+        self.vevents = vevents  # uid → (fingerprint, chunk)
+        self.order = order      # uids in start order
+        digest = hashlib.sha1()
+        for uid in order:
+            digest.update(repr((uid, vevents[uid][0])).encode("utf-8"))
+        self.etag = digest.hexdigest()
+        self._body = None
+
+    def __len__(self):
+        return len(self.order)
+
+    def __iter__(self):
+        yield _HEADER
+        for uid in self.order:
+            yield self.vevents[uid][1]
+        yield _FOOTER
+
+    def body(self):
+        if self._body is None:
+            self._body = b"".join(self)
+        return self._body
+
+
+def build_feed(key, events, previous=None):
+    """
+    Render a Feed for `events`, reusing VEVENTs from `previous` whose event
+    did not change. Returns (feed, rendered_count).
+    """
+    old = previous.vevents if previous is not None else {}
+    dtstamp = time.strftime("%Y%m%dT%H%M%SZ", time.gmtime())
+    vevents, order, rendered = {}, [], 0
+    for e in events:
+        uid = event_uid(e)
+        if uid in vevents:
+            continue
+        fingerprint = tuple(sorted((k, v) for k, v in e.items() if v is not None))
+        cached = old.get(uid)
+        if cached is not None and cached[0] == fingerprint:
+            vevents[uid] = cached
+        else:
+            try:
+                vevents[uid] = (fingerprint, render_vevent(e, dtstamp))
+            except (TypeError, ValueError):
+                continue
+            rendered += 1
+        order.append(uid)
+    return Feed(key, vevents, order), rendered
+
+
+_feeds = LRUCache(ICS_FEED_CACHE_SIZE)  # user → latest Feed
+
+
+def feed_window(now=None):
+    """Today 00:00 EST → ICS_FEED_DAYS later (naive EST)."""
+    now = now or datetime.now(_EASTERN).replace(tzinfo=None)
+    start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    return start, start + timedelta(days=ICS_FEED_DAYS) - timedelta(minutes=1)
+
+
+async def get_feed_async(user_id="default"):
+    """
+    The user's current Feed, or None if they have no free time at all.
+    Costs a stat() per input and a dict lookup when nothing changed
+    (the availability digest is memoized on the cached index).
+    """
+    availability = load_user_availability(user_id)
+    if availability is None:
+        return None
+
+    events = await load_events_snapshot_async()
+    if events is None:
+        events = load_last_good_events()
+    range_start, range_end = feed_window()
+    # The JSON fallback has no version: always re-match, still incrementally.
+    key = (availability.digest(), getattr(events, "version", None), range_start.date())
+
+    user = str(user_id)
+    previous = _feeds.get(user)
+    if previous is not None and key[1] is not None and previous.key == key:
+        return previous
+
+    matched = filter_events_by_free_time(events, availability, range_start, range_end)
+    feed, rendered = build_feed(key, matched, previous)
+    _feeds.put(user, feed)
+    print(f"📅 Feed for {user}: {len(feed)} events ({rendered} rendered, {len(feed) - rendered} reused)")
+    return feed
@@ -0,0 +1,165 @@
+# backend/services/itinerary_service.py
+# ---------------------------------------------------
+# Conflict-aware itinerary builder for the events a user picked.
+#
+# Two events are compatible when the second starts no earlier than the
+# first ends, plus a travel buffer if they are at different locations.
+# - build_itinerary(): maximum-weight set of mutually compatible events
+#   (weighted interval scheduling, O(n log n))
+# - conflict_report(): every incompatible pair and every event outside
+#   the user's free time
+# ---------------------------------------------------
+
+import heapq
+from bisect import bisect_right
+
+from backend.services.availability_service import AvailabilityIndex, absolute_minute
+from backend.utils.time_utils import parse_event_span
+
+DEFAULT_TRAVEL_BUFFER = 15  # minutes between events at different locations
+MAX_TRAVEL_BUFFER = 240
+MAX_CANDIDATES = 1000
+
+
+class _Candidate:
+    __slots__ = ("pos", "event", "start", "end", "location", "weight")
+
+    def __init__(self, pos, event, start, end, weight):
+        self.pos = pos
+        self.event = event
+        self.start = start
+        self.end = end
+        self.weight = weight
+        location = (event.get("location") or "").strip().lower()
+        self.location = location or None  # unknown location never matches another
+
+
+def _gap_needed(a, b, buffer):
+    """Minutes required between a's end and b's start."""
+    return 0 if a.location is not None and a.location == b.location else buffer
+
+
+def _prepare(events, free_time):
+    """
+    Parse candidates and find the ones outside the free time.
+    Returns (candidates, invalid, outside): every parseable candidate,
+    the unparseable events, and the candidates that do not fit.
+    """
+    candidates, invalid = [], []
+    for pos, e in enumerate(events):
+        try:
+            start_dt, end_dt = parse_event_span(e.get("start"), e.get("end"))
+            weight = float(e.get("weight", 1))
+        except (TypeError, ValueError):
+            invalid.append(e)
+            continue
+        if weight <= 0:
+            invalid.append(e)
+            continue
+        candidates.append((start_dt, end_dt, _Candidate(
+            pos, e, absolute_minute(start_dt), absolute_minute(end_dt), weight
+        )))
+
+    if free_time is None or not candidates:
+        return [c for _, _, c in candidates], invalid, []
+
+    if not isinstance(free_time, AvailabilityIndex):
+        free_time = AvailabilityIndex.from_free_time(free_time)
+    first = min(s for s, _, _ in candidates).date()
+    last = max(e for _, e, _ in candidates).date()
+    calendar = free_time.calendar(first, last)
+
+    outside = [c for _, _, c in candidates if not calendar.fits(c.start, c.end)]
+    return [c for _, _, c in candidates], invalid, outside
+
+
+def build_itinerary(events, free_time=None, travel_buffer=DEFAULT_TRAVEL_BUFFER):
+    """
+    Pick the maximum-total-weight subset of `events` (each may carry a
+    numeric "weight", default 1) that fits the free time and has no
+    overlaps or too-short travel gaps.
+
+    best[j] = weight_j + max(best[i]) over events i ending in time for j:
+    either any event ending ≤ start_j - buffer, or an event at j's own
+    location ending ≤ start_j. Both are prefix maxima over end-sorted
+    lists, so each lookup is one binary search.
+    """
+    candidates, invalid, outside = _prepare(events, free_time)
+    outside_pos = {c.pos for c in outside}
+    candidates = [c for c in candidates if c.pos not in outside_pos]
+    candidates.sort(key=lambda c: (c.end, c.start))
+
+    # Running (end, best-so-far, index) prefix maxima: global and per location.
+    all_ends, all_best = [], []
+    by_location = {}
+    best, prev = [0.0] * len(candidates), [None] * len(candidates)
+
+    def prefix_best(ends, bests, limit):
+        k = bisect_right(ends, limit) - 1
+        return bests[k] if k >= 0 else (0.0, None)
+
+    for j, c in enumerate(candidates):
+        options = [prefix_best(all_ends, all_best, c.start - travel_buffer)]
+        if c.location is not None and c.location in by_location:
+            ends, bests = by_location[c.location]
+            options.append(prefix_best(ends, bests, c.start))
+        score, i = max(options, key=lambda o: o[0])
+        best[j], prev[j] = c.weight + score, i
+
+        top = max(all_best[-1], (best[j], j), key=lambda o: o[0]) if all_best else (best[j], j)
+        all_ends.append(c.end)
+        all_best.append(top)
+        if c.location is not None:
+            ends, bests = by_location.setdefault(c.location, ([], []))
+            top = max(bests[-1], (best[j], j), key=lambda o: o[0]) if bests else (best[j], j)
+            ends.append(c.end)
+            bests.append(top)
+
+    chosen = []
+    j = all_best[-1][1] if all_best else None
+    while j is not None:
+        chosen.append(candidates[j])
+        j = prev[j]
+    chosen.reverse()
+
+    chosen_pos = {c.pos for c in chosen}
+    return {
+        "selected": [c.event for c in chosen],
+        "total_weight": sum(c.weight for c in chosen),
+        "dropped": [c.event for c in sorted(candidates, key=lambda c: c.pos) if c.pos not in chosen_pos],
+        "outside_free_time": [c.event for c in outside],
+        "invalid": invalid,
+    }
+
+
+def conflict_report(events, free_time=None, travel_buffer=DEFAULT_TRAVEL_BUFFER):
+    """
+    List incompatible pairs among `events` ("overlap", or "travel" when they
+    only collide because of the buffer) and events outside the free time.
+    Pairs are checked across all valid events, in or out of free time.
+    Sweep by start time keeping a heap of events that may still collide:
+    O(n log n + conflicts).
+    """
+    candidates, invalid, outside = _prepare(events, free_time)
+    candidates.sort(key=lambda c: (c.start, c.end))
+
+    conflicts = []
+    active = []  # heap of (end + buffer, pos, candidate)
+    for c in candidates:
+        while active and active[0][0] <= c.start:
+            heapq.heappop(active)
+        for _, _, other in active:
+            if c.start < other.end:
+                reason = "overlap"
+            elif c.start < other.end + _gap_needed(other, c, travel_buffer):
+                reason = "travel"
+            else:
+                continue
+            conflicts.append({"first": other.event, "second": c.event, "reason": reason})
+        heapq.heappush(active, (c.end + travel_buffer, c.pos, c))
+
+    return {
+        "conflicts": conflicts,
+        "outside_free_time": [c.event for c in outside],
+        "invalid": invalid,
+    }
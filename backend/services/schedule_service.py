@@ -3,12 +3,25 @@
 import json
 import os
 from datetime import datetime
-from services.event_service import fetch_events_from_corq, filter_events_by_free_time
+from backend.profiling import stage
+from backend.utils.paths import data_path
+from backend.services import http_client
+from backend.services.availability_service import (
+    AvailabilityIndex,
+    load_availability,
+    save_availability,
+    user_key,
+)
+from backend.services.event_service import (
+    filter_events_by_free_time,
+    load_events_snapshot_async,
+    load_last_good_events,
+)
 
 # === File path ===
-SCHEDULE_PATH = "backend/data/schedule.json"
-FREE_TIME_PATH = "backend/data/free_time.json"
-MATCHED_PATH = "backend/data/matched_events.json"
+SCHEDULE_PATH = data_path("schedule.json")
+FREE_TIME_PATH = data_path("free_time.json")
+MATCHED_PATH = data_path("matched_events.json")
 
 
 # === Load & Save ===
@@ -69,56 +82,126 @@ def calc_free_time_only(busy_schedule):
     """
     Used for AI upload route — only calculates free time without saving anything.
     """
-    return calc_free_time(busy_schedule)
+    with stage("calc_free_time"):
+        return calc_free_time(busy_schedule)
 
 
-# === Existing: Full pipeline (AI → save → fetch events → match) ===
-def generate_free_time():
-    """Used only when finalizing user free time"""
-    print("🚀 Generating free time and matching events...")
+def free_time_path(user_id="default"):
+    """The signed-out/default user keeps the original free_time.json."""
+    if str(user_id) == "default":
+        return FREE_TIME_PATH
+    return data_path(f"free_time_{user_key(user_id)}.json")
+
 
+def load_user_availability(user_id="default"):
+    """
+    The user's availability index. Free time saved before indexes existed
+    (free_time.json) is indexed once on first use. Only the default user
+    falls back to free time derived from the shared busy schedule.
+    None if there is nothing to go on.
+    """
+    with stage("load_availability"):
+        availability = load_availability(user_id)
+    if availability is not None:
+        return availability
+
+    path = free_time_path(user_id)
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                availability = save_availability(user_id, json.load(f))
+            print(f"🗂️ Indexed saved free time → {path}")
+            return availability
+        except (ValueError, TypeError, KeyError, AttributeError) as e:
+            print(f"⚠️ Could not index saved free time {path}: {e}")
+
+    if str(user_id) != "default":
+        return None
     busy_schedule = load_schedule()
     if "message" in busy_schedule:
-        print("❌ No busy schedule found.")
-        return {"message": "No busy schedule to process."}
+        return None
+    with stage("calc_free_time"):
+        availability = AvailabilityIndex.from_free_time(calc_free_time(busy_schedule))
+    print("🕓 No saved free time; using free time from the busy schedule.")
+    return availability
 
-    free_time = calc_free_time(busy_schedule)
-    save_json(FREE_TIME_PATH, free_time)
-    print("🕓 Free time saved.")
 
-    latest_events = fetch_events_from_corq()
-    matched_events = filter_events_by_free_time(events=latest_events, free_time=free_time)
+# === Existing: Full pipeline (AI → save → fetch events → match) ===
+def generate_free_time(user_id="default", range_start=None, range_end=None,
+                       tolerance=0, min_free=None):
+    """Used only when finalizing user free time"""
+    return http_client.run_sync(generate_free_time_async(
+        user_id, range_start, range_end, tolerance, min_free))
+
+async def generate_free_time_async(user_id="default", range_start=None, range_end=None,
+                                   tolerance=0, min_free=None):
+    """
+    Async pipeline behind generate_free_time(); awaited directly by async views.
+    Uses the user's saved availability index; falls back to free time
+    derived from the busy schedule if they have not saved any yet.
+    range_start / range_end / tolerance / min_free: see filter_events_by_free_time().
+    """
+    print("🚀 Generating free time and matching events...")
 
-    save_json(MATCHED_PATH, matched_events)
+    availability = load_user_availability(user_id)
+    if availability is None:
+        print("❌ No free time or busy schedule found.")
+        return {"message": "No free time or busy schedule to process."}
+
+    with stage("load_events"):
+        latest_events = await load_events_snapshot_async()
+        if latest_events is None:
+            latest_events = load_last_good_events()
+    with stage("filter_events_by_free_time"):
+        matched_events = filter_events_by_free_time(
+            events=latest_events,
+            free_time=availability,
+            range_start=range_start,
+            range_end=range_end,
+            tolerance=tolerance,
+            min_free=min_free,
+        )
+
+    with stage("save_matched_events"):
+        save_json(MATCHED_PATH, matched_events)
     print(f"✅ {len(matched_events)} matched events saved → {MATCHED_PATH}")
 
     return {
-        "free_time": free_time,
+        "free_time": availability.to_free_time(),
         "matched_events_count": len(matched_events),
         "matched_events": matched_events
     }
 
 # === Save user's manually selected free time ===
-def save_user_free_time(data):
+def save_user_free_time(data, user_id="default"):
     """
     Save the user's selected/adjusted free time schedule
-    (from frontend 'Save' button).
+    (from frontend 'Save' button) and rebuild their availability index.
+    Raises ValueError (nothing is saved) if the free time is malformed.
     """
     try:
-        os.makedirs(os.path.dirname(FREE_TIME_PATH), exist_ok=True)
-        with open(FREE_TIME_PATH, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        path = free_time_path(user_id)
+        save_availability(user_id, data)
+        save_json(path, data)
 
-        print(f"💾 Saved user free time → {FREE_TIME_PATH}")
+        print(f"💾 Saved user free time → {path}")
         return {"message": "✅ Free time saved successfully."}
 
+    except ValueError:
+        raise
     except Exception as e:
         print(f"❌ Failed to save user free time: {e}")
         return {"error": str(e)}
 
-def generate_matched_events():
+def generate_matched_events(user_id="default", range_start=None, range_end=None,
+                            tolerance=0, min_free=None):
     """
     Wrapper for backward compatibility with routes that import this name.
     Simply calls generate_free_time().
     """
-    return generate_free_time()
+    return generate_free_time(user_id, range_start, range_end, tolerance, min_free)
+
+async def generate_matched_events_async(user_id="default", range_start=None, range_end=None,
+                                        tolerance=0, min_free=None):
+    """Async counterpart of generate_matched_events()."""
+    return await generate_free_time_async(user_id, range_start, range_end, tolerance, min_free)
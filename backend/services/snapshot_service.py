@@ -0,0 +1,201 @@
+# backend/services/snapshot_service.py
+# ---------------------------------------------------
+# Shared, memory-mapped event snapshot for multi-process deployments.
+#
+# The ingestion step publishes the normalized CORQ catalog once as a
+# columnar file; every worker process maps the same pages read-only
+# (zero-copy, shared page cache) and picks up a new version on its next
+# request after the file is atomically replaced.
+#
+# Layout (native byte order; the file never leaves the host):
+#   header   magic, format, version (publish time, ns), counts
+#   starts   int64[n]             absolute minutes (see absolute_minute)
+#   ends     int64[n]
+#   fields   uint32[n_fields * n] string-table index per field, field-major
+#   offsets  uint32[n_strings+1]  string table offsets into blob
+#   blob     utf-8 bytes
+# The first n_fields strings are the field names themselves, so files
+# written with fewer FIELDS stay readable (missing fields are absent).
+# ---------------------------------------------------
+
+import mmap
+import os
+import struct
+import threading
+import time
+from array import array
+from contextlib import contextmanager
+
+from backend.services.availability_service import absolute_minute
+from backend.utils.paths import data_path
+from backend.utils.time_utils import parse_event_span
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process refresh lock
+    fcntl = None
+
+SNAPSHOT_PATH = data_path("events.snap")
+SNAPSHOT_LOCK_PATH = data_path("events.snap.lock")
+
+FIELDS = ("name", "start", "end", "location", "organization", "id")
+NONE = 0xFFFFFFFF
+
+_MAGIC = b"BCEV"
+_FORMAT_VERSION = 1
+_HEADER = struct.Struct("=4sHxxQIIII")  # 32 bytes, keeps int64 columns aligned
+
+
+class EventSnapshot:
+    """Read-only view over one mapped snapshot file."""
+
+    def __init__(self, mm, file_id):
+        self._mm = mm
+        self.file_id = file_id
+        view = memoryview(mm)
+
+        magic, fmt, self.version, n, n_fields, n_strings, _ = _HEADER.unpack_from(mm)
+        if magic != _MAGIC or fmt != _FORMAT_VERSION:
+            raise ValueError("Not a betterCorq event snapshot")
+        self.count = n
+
+        pos = _HEADER.size
+        self.starts = view[pos:pos + 8 * n].cast("q")
+        pos += 8 * n
+        self.ends = view[pos:pos + 8 * n].cast("q")
+        pos += 8 * n
+        fields = view[pos:pos + 4 * n * n_fields].cast("I")
+        pos += 4 * n * n_fields
+        self._offsets = view[pos:pos + 4 * (n_strings + 1)].cast("I")
+        pos += 4 * (n_strings + 1)
+        self._blob = pos
+
+        names = [self.string(i) for i in range(n_fields)]
+        self._columns = [(name, fields[k * n:(k + 1) * n]) for k, name in enumerate(names)]
+
+    def string(self, i):
+        if i == NONE:
+            return None
+        start = self._blob + self._offsets[i]
+        end = self._blob + self._offsets[i + 1]
+        return self._mm[start:end].decode("utf-8")
+
+    def event(self, i):
+        """Materialize event i as the JSON dict shape used everywhere else."""
+        return {name: self.string(column[i]) for name, column in self._columns}
+
+    def events(self):
+        return [self.event(i) for i in range(self.count)]
+
+    def age(self):
+        """Seconds since this version was published."""
+        return time.time() - self.version / 1e9
+
+    def __len__(self):
+        return self.count
+
+
+def _encode(events):
+    """Build the snapshot bytes for a list of event dicts, sorted by start."""
+    rows = []
+    for e in events:
+        try:
+            start_dt, end_dt = parse_event_span(e.get("start"), e.get("end"))
+        except (TypeError, ValueError):
+            continue
+        rows.append((absolute_minute(start_dt), absolute_minute(end_dt), e))
+    rows.sort(key=lambda r: r[0])
+
+    strings, table = list(FIELDS), {name: i for i, name in enumerate(FIELDS)}
+
+    def intern(value):
+        if value is None:
+            return NONE
+        value = str(value)
+        i = table.get(value)
+        if i is None:
+            i = table[value] = len(strings)
+            strings.append(value)
+        return i
+
+    columns = [array("I", (intern(r[2].get(name)) for r in rows)) for name in FIELDS]
+
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets, total = array("I", [0]), 0
+    for b in encoded:
+        total += len(b)
+        offsets.append(total)
+
+    header = _HEADER.pack(_MAGIC, _FORMAT_VERSION, time.time_ns(), len(rows),
+                          len(FIELDS), len(strings), total)
+    parts = [header, array("q", (r[0] for r in rows)).tobytes(),
+             array("q", (r[1] for r in rows)).tobytes()]
+    parts += [c.tobytes() for c in columns]
+    parts += [offsets.tobytes()] + encoded
+    return b"".join(parts)
+
+
+def publish_snapshot(events):
+    """Write a new snapshot version and atomically swap it into place."""
+    raw = _encode(events)
+    os.makedirs(os.path.dirname(SNAPSHOT_PATH), exist_ok=True)
+    tmp_path = f"{SNAPSHOT_PATH}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(raw)
+        f.flush()
+        os.fsync(f.fileno())
+    # Workers holding the old mapping keep reading the old inode until they swap.
+    os.replace(tmp_path, SNAPSHOT_PATH)
+    return _HEADER.unpack_from(raw)[2]
+
+
+_current = None
+_current_lock = threading.Lock()
+
+
+def current_snapshot():
+    """
+    The latest published snapshot, mapped once per version per process.
+    Costs one stat() per call when nothing changed; None if never published.
+    """
+    global _current
+    try:
+        st = os.stat(SNAPSHOT_PATH)
+    except FileNotFoundError:
+        return None
+    file_id = (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    snapshot = _current
+    if snapshot is not None and snapshot.file_id == file_id:
+        return snapshot
+
+    with _current_lock:
+        if _current is not None and _current.file_id == file_id:
+            return _current
+        with open(SNAPSHOT_PATH, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        # The previous mapping is released once in-flight requests drop it.
+        _current = EventSnapshot(mm, file_id)
+        return _current
+
+
+@contextmanager
+def refresh_lock():
+    """
+    Cross-process, non-blocking lock around a snapshot refresh.
+    Yields True if this process should refresh, False if another one is.
+    """
+    if fcntl is None:
+        yield True
+        return
+    os.makedirs(os.path.dirname(SNAPSHOT_LOCK_PATH), exist_ok=True)
+    with open(SNAPSHOT_LOCK_PATH, "a") as f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
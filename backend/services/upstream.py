@@ -0,0 +1,208 @@
+# backend/services/upstream.py
+# ---------------------------------------------------
+# Resilience layer for upstream calls (CORQ, OpenRouter).
+#
+# - per-call deadline shared by all attempts, covering the wait for a
+#   concurrency slot and the whole response (not just each socket phase)
+# - per-upstream concurrency limit (its own pool of slots)
+# - jittered exponential backoff on transport errors / 429 / 5xx
+# - circuit breaker that fails fast while the upstream is down
+# - singleflight: concurrent callers for the same key share one call
+# ---------------------------------------------------
+
+import asyncio
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future
+
+import httpx
+
+from backend.services import http_client
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class UpstreamError(Exception):
+    """Raised when an upstream call fails after retries (or is refused)."""
+
+
+class CircuitOpenError(UpstreamError):
+    """Raised without calling the upstream while its circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+    closed → open after `failure_threshold` failed calls;
+    open → half-open after `reset_timeout` seconds (one trial call);
+    half-open → closed on success, back to open on failure.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        """Return True if a call may go through right now."""
+        with self._lock:
+            state = self._state()
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls per key: the first caller runs the coroutine,
+    everyone arriving while it is in flight awaits the same result.
+    Works across event loops (the per-request loops of Flask async views).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inflight = {}
+
+    async def do(self, key, coro_factory):
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+
+        if not leader:
+            return await asyncio.wrap_future(future)
+
+        try:
+            result = await coro_factory()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+
+class Upstream:
+    """One upstream service: its deadline, retry policy and circuit breaker."""
+
+    def __init__(self, name, deadline, attempts=3, base_delay=0.2, max_delay=2.0,
+                 failure_threshold=5, reset_timeout=30.0, concurrency=None):
+        self.name = name
+        self.deadline = deadline
+        self.concurrency = concurrency or http_client.UPSTREAM_CONCURRENCY
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+
+    def _backoff(self, attempt):
+        # "Full jitter": uniform in [0, min(cap, base * 2^attempt)]
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    async def request(self, method, url, deadline=None, **kwargs):
+        """
+        Send a request with retries inside one overall deadline.
+        Returns the httpx.Response for any non-retryable status;
+        raises UpstreamError / CircuitOpenError otherwise.
+        """
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"{self.name}: circuit open")
+
+        try:
+            res = await self._attempt_all(method, url, deadline or self.deadline, **kwargs)
+        except BaseException:
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        return res
+
+    async def _attempt_all(self, method, url, deadline, **kwargs):
+        stop_at = time.monotonic() + deadline
+        last_error = None
+
+        for attempt in range(self.attempts):
+            remaining = stop_at - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                timeout = httpx.Timeout(
+                    remaining, connect=min(remaining, http_client.UPSTREAM_CONNECT_TIMEOUT)
+                )
+                # httpx.Timeout bounds each connect/read/write separately; wait_for
+                # bounds the attempt as a whole, including queueing for a slot.
+                res = await asyncio.wait_for(
+                    http_client.request(method, url, limit_key=self.name, limit=self.concurrency,
+                                        timeout=timeout, **kwargs),
+                    remaining,
+                )
+                if res.status_code not in RETRY_STATUSES:
+                    return res
+                last_error = f"HTTP {res.status_code}"
+            except asyncio.TimeoutError:
+                last_error = "deadline exceeded"
+                break
+            except httpx.HTTPError as e:
+                last_error = f"{type(e).__name__}: {e}"
+
+            if attempt + 1 < self.attempts:
+                delay = min(self._backoff(attempt), stop_at - time.monotonic())
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+        raise UpstreamError(f"{self.name}: {last_error or 'deadline exceeded'}")
+
+
+CORQ = Upstream(
+    "corq",
+    deadline=float(os.getenv("CORQ_DEADLINE", "10")),
+    attempts=int(os.getenv("CORQ_ATTEMPTS", "3")),
+    concurrency=int(os.getenv("CORQ_CONCURRENCY", "8")),
+)
+
+# The AI call is slow and paid: one retry at most, generous deadline.
+OPENROUTER = Upstream(
+    "openrouter",
+    deadline=float(os.getenv("OPENROUTER_DEADLINE", "90")),
+    attempts=int(os.getenv("OPENROUTER_ATTEMPTS", "2")),
+    failure_threshold=3,
+    reset_timeout=60.0,
+    concurrency=int(os.getenv("OPENROUTER_CONCURRENCY", str(http_client.UPSTREAM_CONCURRENCY))),
+)
@@ -0,0 +1,16 @@
+# backend/utils/paths.py
+# ---------------------------------------------------
+# Filesystem locations resolved from the package, not the CWD,
+# so the app starts the same from any working directory.
+# Set BETTERCORQ_DATA_DIR to keep runtime data elsewhere.
+# ---------------------------------------------------
+
+import os
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.abspath(os.getenv("BETTERCORQ_DATA_DIR", os.path.join(BACKEND_DIR, "data")))
+
+
+def data_path(*parts):
+    """Absolute path of a file under the data directory."""
+    return os.path.join(DATA_DIR, *parts)
@@ -5,8 +5,12 @@
 # converts time formats, and applies matching tolerance.
 # ---------------------------------------------------
 
+import os
 from datetime import datetime, timedelta
 
+# Longest ?from/?to window the matching APIs accept (one academic year).
+MAX_DATE_RANGE_DAYS = int(os.getenv("MAX_DATE_RANGE_DAYS", "366"))
+
 def calculate_free_time(schedule_data):
     """Same as before — calculates free blocks per day."""
     day_hours = (8 * 60, 22 * 60)
@@ -38,6 +42,80 @@ def calculate_free_time(schedule_data):
     return free_times
 
 
+def parse_event_span(start_str, end_str):
+    """
+    Parse a stored event's times into naive EST datetimes.
+    start: "2025-11-07 08:00 PM EST", end: "10:00 PM EST" (same day,
+    or the next day when the end is earlier than the start).
+
+    Raises:
+        ValueError / TypeError: if either string is missing or malformed
+    """
+    start_dt = datetime.strptime(start_str, "%Y-%m-%d %I:%M %p EST")
+    end_t = datetime.strptime(end_str, "%I:%M %p EST")
+    end_dt = start_dt.replace(hour=end_t.hour, minute=end_t.minute)
+    if end_dt < start_dt:  # runs past midnight
+        end_dt += timedelta(days=1)
+    return start_dt, end_dt
+
+
+def parse_date_range(date_from=None, date_to=None):
+    """
+    Parse optional 'YYYY-MM-DD' query values into a (start, end) datetime
+    range covering both days fully. Missing values come back as None
+    (callers apply their own default window).
+
+    Raises:
+        ValueError: on a malformed date, when date_to is before date_from,
+            or when the window (with the callers' defaults: today / 7 days
+            after the start) is longer than MAX_DATE_RANGE_DAYS
+    """
+    start = datetime.strptime(date_from, "%Y-%m-%d") if date_from else None
+    end = datetime.strptime(date_to, "%Y-%m-%d").replace(hour=23, minute=59) if date_to else None
+    if start and end and end < start:
+        raise ValueError("'to' date is before 'from' date")
+
+    first = start or datetime.now()
+    last = end
+    if last is None:
+        try:
+            last = first + timedelta(days=7)
+        except OverflowError:
+            raise ValueError("'from' date is out of range")
+    if (last.date() - first.date()).days + 1 > MAX_DATE_RANGE_DAYS:
+        raise ValueError(f"date range is longer than {MAX_DATE_RANGE_DAYS} days")
+    return start, end
+
+
+def parse_match_options(tolerance=None, min_free=None):
+    """
+    Parse optional ?tolerance= / ?min_free= query values (minutes) into
+    (tolerance, min_free): tolerance defaults to 0, min_free to None.
+
+    Raises:
+        ValueError: on a non-integer or negative value, or a tolerance
+            above one day
+    """
+    tol = int(tolerance) if tolerance not in (None, "") else 0
+    free = int(min_free) if min_free not in (None, "") else None
+    if tol < 0 or tol > 24 * 60:
+        raise ValueError("tolerance must be between 0 and 1440 minutes")
+    if free is not None and free < 0:
+        raise ValueError("min_free must not be negative")
+    return tol, free
+
+
+def to_minutes(hhmm):
+    """'13:05' → 785"""
+    h, m = hhmm.split(":")
+    return int(h) * 60 + int(m)
+
+
+def to_hhmm(minutes):
+    """785 → '13:05'"""
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
 def to_iso_format(date_str, time_str):
     """Convert 'YYYY-MM-DD' + 'HH:MM' to ISO 8601 format."""
     dt = datetime.strptime(f"{date_str} {time_str}", "%Y-%m-%d %H:%M")
@@ -48,6 +126,8 @@ def is_within_tolerance(event_time, free_start, free_end, tolerance):
     """
     Check whether an event fits within the user's free time block,
     allowing ±tolerance (user-defined minutes).
+    Single-event reference check; the recommend APIs apply the same
+    tolerance in bulk via CalendarRange(pad=tolerance).
 
     Args:
         event_time (str): Event start time, e.g. "13:05"
@@ -58,7 +138,7 @@ def is_within_tolerance(event_time, free_start, free_end, tolerance):
     Returns:
         bool: True if event fits within the adjusted window
     """
-    t_event = datetime.strptime(event_time, "%H:%M")
-    t_start = datetime.strptime(free_start, "%H:%M") - timedelta(minutes=tolerance)
-    t_end = datetime.strptime(free_end, "%H:%M") + timedelta(minutes=tolerance)
+    t_event = to_minutes(event_time)
+    t_start = to_minutes(free_start) - tolerance
+    t_end = to_minutes(free_end) + tolerance
     return t_start <= t_event <= t_end
@@ -0,0 +1,161 @@
+# testFiles/bench_async_serving.py
+# ---------------------------------------------------
+# Concurrent slow-upstream benchmark: a single sync WSGI worker vs a
+# threaded WSGI worker (the supported serving mode, see backend/app.py).
+#
+# A fake OpenRouter endpoint answers after UPSTREAM_DELAY seconds. We fire
+# CONCURRENCY simultaneous POST /api/ai/upload-schedule requests (distinct
+# images) at each serving mode and report wall time and throughput.
+# Every request must reach the upstream once: the run asserts the fake's
+# hit count, so request coalescing (SingleFlight, the shared event
+# snapshot) cannot make a mode look faster than it is.
+#
+#   python testFiles/bench_async_serving.py
+#
+# Reference run (1 process each, 50 concurrent requests, 0.5s upstream):
+#   wsgi (1 sync worker)     wall  25.69s    1.95 req/s  p50 13.46s  p99 25.17s
+#   wsgi (threaded)          wall   1.46s   34.19 req/s  p50  0.91s  p99  1.45s
+# The threaded run takes two waves because OPENROUTER_CONCURRENCY caps
+# in-flight calls at 32.
+# ---------------------------------------------------
+
+import asyncio
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+UPSTREAM_DELAY = 0.5
+CONCURRENCY = 50
+ROUTE = "/api/ai/upload-schedule"
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+BUSY = {"Mon": [["09:30", "10:50"]], "Tue": [["12:30", "13:45"]]}
+
+
+class SlowOpenRouterHandler(BaseHTTPRequestHandler):
+    """Fake chat-completions endpoint: sleeps, then returns a busy schedule."""
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        with self.server.hits_lock:
+            self.server.hits += 1
+        time.sleep(UPSTREAM_DELAY)
+        body = json.dumps({"choices": [{"message": {"content": json.dumps(BUSY)}}]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class UpstreamServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+    hits = 0
+    hits_lock = threading.Lock()
+
+
+def start_upstream():
+    server = UpstreamServer(("127.0.0.1", free_port()), SlowOpenRouterHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+MODES = {
+    "wsgi": "wsgi (1 sync worker)",
+    "wsgi-threaded": "wsgi (threaded)",
+}
+
+
+def start_server(mode, port, workdir, env):
+    code = (
+        "import sys; sys.path.insert(0, %r)\n"
+        "from werkzeug.serving import run_simple\n"
+        "from backend.app import create_app\n"
+        "run_simple('127.0.0.1', %d, create_app(), threaded=%r)\n"
+        % (REPO_ROOT, port, mode == "wsgi-threaded")
+    )
+    cmd = [sys.executable, "-c", code]
+    return subprocess.Popen(cmd, cwd=workdir, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+async def wait_ready(base):
+    async with httpx.AsyncClient() as client:
+        for _ in range(100):
+            try:
+                await client.get(base + "/")
+                return
+            except httpx.HTTPError:
+                await asyncio.sleep(0.1)
+    raise RuntimeError("server did not start")
+
+
+async def fire(base):
+    async def one(client, i):
+        t0 = time.perf_counter()
+        image = ("schedule-%d.png" % i, b"\x89PNG fake image %d" % i, "image/png")
+        res = await client.post(base + ROUTE, files={"file": image})
+        assert res.status_code == 200, res.text
+        return time.perf_counter() - t0
+
+    limits = httpx.Limits(max_connections=CONCURRENCY)
+    async with httpx.AsyncClient(timeout=120, limits=limits) as client:
+        t0 = time.perf_counter()
+        latencies = await asyncio.gather(*(one(client, i) for i in range(CONCURRENCY)))
+        wall = time.perf_counter() - t0
+    latencies.sort()
+    return wall, latencies
+
+
+def main():
+    upstream = start_upstream()
+    workdir = tempfile.mkdtemp(prefix="bettercorq-bench-")
+
+    env = dict(os.environ)
+    env["BETTERCORQ_DATA_DIR"] = workdir
+    env["RATELIMIT_ENABLED"] = "0"   # one client, many requests: not what we measure
+    env["OPENROUTER_URL"] = "http://127.0.0.1:%d/chat/completions" % upstream.server_address[1]
+
+    try:
+        for mode, label in MODES.items():
+            port = free_port()
+            proc = start_server(mode, port, workdir, env)
+            base = "http://127.0.0.1:%d" % port
+            try:
+                asyncio.run(wait_ready(base))
+                hits_before = upstream.hits
+                wall, lat = asyncio.run(fire(base))
+                assert upstream.hits - hits_before == CONCURRENCY, upstream.hits - hits_before
+            finally:
+                proc.terminate()
+                proc.wait()
+            print(f"{label:<24} wall {wall:6.2f}s  {CONCURRENCY / wall:6.2f} req/s  "
+                  f"p50 {lat[len(lat) // 2]:5.2f}s  p99 {lat[int(len(lat) * 0.99) - 1]:5.2f}s")
+    finally:
+        upstream.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
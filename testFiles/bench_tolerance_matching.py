@@ -0,0 +1,152 @@
+# testFiles/bench_tolerance_matching.py
+# ---------------------------------------------------
+# Tolerance / partial-overlap matching benchmark.
+#
+# Synthetic catalogs (random events over one semester) are published as
+# the shared snapshot, then filtered against a class-schedule free time
+# for every tolerance and in min_free mode. The batched path applies the
+# tolerance inside its one binary search per event, so the lookup cost
+# stays flat as the tolerance grows. "naive" is the per-event
+# is_within_tolerance() loop over every free block of the event's weekday
+# (start and end checked).
+#
+#   python testFiles/bench_tolerance_matching.py
+#
+# Reference run (best of 3, ns per catalog event):
+#       events   naive t=15     t=0    t=15    t=60   t=240   min_free=30
+#         1000        30917    1755    1787    2016    2737          2617
+#        10000        30447    1606    1693    1992    2680          2429
+#       100000        30955    1606    1608    1969    2730          2477
+#   matched @100k: naive 44828 | 41075, 44828, 56241, 82782 | 51289
+# (same-day matches at t=15 must equal the naive count; the run asserts it)
+# The interval lookup costs the same at every tolerance; what grows is
+# materializing the extra matched event dicts (41% → 83% of the catalog).
+# ---------------------------------------------------
+
+import contextlib
+import io
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, REPO_ROOT)
+
+DATA_DIR = tempfile.mkdtemp(prefix="bettercorq-bench-")
+os.environ["BETTERCORQ_DATA_DIR"] = DATA_DIR
+
+from backend.services.availability_service import AvailabilityIndex  # noqa: E402
+from backend.services.event_service import filter_events_by_free_time  # noqa: E402
+from backend.services.snapshot_service import current_snapshot, publish_snapshot  # noqa: E402
+from backend.utils.time_utils import is_within_tolerance, parse_event_span  # noqa: E402
+
+SIZES = (1_000, 10_000, 100_000)
+TOLERANCES = (0, 15, 60, 240)
+MIN_FREE = 30
+REPEAT = 3
+
+SEMESTER_START = datetime(2025, 8, 25)
+SEMESTER_END = datetime(2025, 12, 12, 23, 59)
+
+FREE_TIME = {
+    "Mon": [["08:00", "09:30"], ["10:50", "14:00"], ["14:55", "22:00"]],
+    "Tue": [["08:00", "12:30"], ["13:45", "22:00"]],
+    "Wed": [["08:00", "09:30"], ["10:50", "14:00"], ["14:55", "22:00"]],
+    "Thu": [["08:00", "12:30"], ["13:45", "22:00"]],
+    "Fri": [["08:00", "22:00"]],
+    "Sat": [["10:00", "22:00"]],
+    "Sun": [["12:00", "20:00"]],
+}
+DAY_NAMES = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+
+def synthetic_events(n, seed=0):
+    rng = random.Random(seed)
+    span = int((SEMESTER_END - SEMESTER_START).total_seconds() // 60)
+    events = []
+    for i in range(n):
+        start = SEMESTER_START + timedelta(minutes=rng.randrange(0, span, 5))
+        end = start + timedelta(minutes=rng.choice((30, 45, 60, 90, 120)))
+        events.append({
+            "name": f"Event {i}",
+            "start": start.strftime("%Y-%m-%d %I:%M %p EST"),
+            "end": end.strftime("%I:%M %p EST"),
+            "location": f"Room {rng.randrange(40)}",
+            "organization": f"Org {rng.randrange(200)}",
+        })
+    return events
+
+
+def _crosses_midnight(event):
+    start, end = parse_event_span(event["start"], event["end"])
+    return end.date() != start.date()
+
+
+def naive_filter(events, free_time, tolerance):
+    """Per-event reference: start and end inside one padded weekday block."""
+    matched = []
+    for e in events:
+        if _crosses_midnight(e):
+            continue
+        start, end = parse_event_span(e["start"], e["end"])
+        blocks = free_time.get(DAY_NAMES[start.weekday()], [])
+        s, t = start.strftime("%H:%M"), end.strftime("%H:%M")
+        if any(is_within_tolerance(s, a, b, tolerance) and is_within_tolerance(t, a, b, tolerance)
+               for a, b in blocks):
+            matched.append(e)
+    return matched
+
+
+def best_of(fn):
+    best, result = float("inf"), None
+    for _ in range(REPEAT):
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def main():
+    availability = AvailabilityIndex.from_free_time(FREE_TIME)
+    header = ["events", "naive t=15"] + [f"t={t}" for t in TOLERANCES] + [f"min_free={MIN_FREE}"]
+    print("   ".join(f"{h:>10}" for h in header))
+
+    for n in SIZES:
+        events = synthetic_events(n)
+        with contextlib.redirect_stdout(io.StringIO()):
+            publish_snapshot(events)
+        snapshot = current_snapshot()
+
+        def run(**kw):
+            return filter_events_by_free_time(snapshot, availability, SEMESTER_START, SEMESTER_END, **kw)
+
+        row, matched = [], []
+        elapsed, result = best_of(lambda: naive_filter(events, FREE_TIME, 15))
+        row.append(elapsed)
+        naive_count = len(result)
+        for tolerance in TOLERANCES:
+            elapsed, result = best_of(lambda: run(tolerance=tolerance))
+            row.append(elapsed)
+            matched.append(len(result))
+            if tolerance == 15:
+                # The naive loop skips events that run past midnight.
+                same_day = [e for e in result if not _crosses_midnight(e)]
+                assert len(same_day) == naive_count, (len(same_day), naive_count)
+        elapsed, result = best_of(lambda: run(min_free=MIN_FREE))
+        row.append(elapsed)
+        matched.append(len(result))
+
+        print("   ".join([f"{n:>10}"] + [f"{t / n * 1e9:>10.0f}" for t in row])
+              + f"   matched {naive_count} / {matched}")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    finally:
+        shutil.rmtree(DATA_DIR, ignore_errors=True)
@@ -0,0 +1,132 @@
+# testFiles/test_availability_index.py
+# ---------------------------------------------------
+# The availability index every recommend route matches against:
+# parsing, the binary file format, dated overrides and CalendarRange.
+#
+#   python -m pytest testFiles/test_availability_index.py
+# ---------------------------------------------------
+
+import os
+import struct
+import sys
+from datetime import date, datetime
+
+import pytest
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, REPO_ROOT)
+
+from backend.services import availability_service  # noqa: E402
+from backend.services.availability_service import AvailabilityIndex, absolute_minute  # noqa: E402
+
+MONDAY = date(2025, 11, 10)
+
+
+def minute(day, hhmm):
+    h, m = map(int, hhmm.split(":"))
+    return absolute_minute(datetime(day.year, day.month, day.day, h, m))
+
+
+def fits(calendar, day, start, end):
+    return calendar.fits(minute(day, start), minute(day, end))
+
+
+def round_trip(index):
+    return AvailabilityIndex.from_bytes(index.to_bytes())
+
+
+def test_weekday_dict_merges_and_round_trips():
+    index = AvailabilityIndex.from_free_time({
+        "Mon": [["09:00", "10:00"], ["08:00", "09:30"]],
+        "Tue": [["13:00", "14:00"], ["14:00", "15:00"]],
+    })
+    free_time = index.to_free_time()
+    assert free_time["Mon"] == [["08:00", "10:00"]]
+    assert free_time["Tue"] == [["13:00", "15:00"]]
+    assert free_time["Wed"] == []
+
+    loaded = round_trip(index)
+    assert loaded.to_free_time() == free_time
+    assert loaded.digest() == index.digest()
+
+
+def test_grid_cells_add_one_slot():
+    index = AvailabilityIndex.from_free_time([
+        {"day": "Mon", "from": "08:00", "to": "09:30"},
+        {"day": "Mon", "from": "10:00", "to": "10:00"},
+        {"day": "Fri", "from": "23:30", "to": "23:30"},
+    ])
+    free_time = index.to_free_time()
+    assert free_time["Mon"] == [["08:00", "10:30"]]  # "to" is the last 30-minute cell
+    assert free_time["Fri"] == [["23:30", "24:00"]]
+
+
+def test_dated_overrides_replace_the_weekly_template():
+    index = AvailabilityIndex.from_free_time({
+        "Mon": [["08:00", "12:00"]],
+        "2025-11-10": [],                   # this Monday: not free at all
+        "2025-11-17": [["14:00", "15:00"]],  # next Monday: afternoon only
+    })
+    loaded = round_trip(index)
+    assert loaded.to_free_time() == index.to_free_time()
+
+    for idx in (index, loaded):
+        calendar = idx.calendar(MONDAY, date(2025, 11, 24))
+        assert not fits(calendar, MONDAY, "09:00", "10:00")
+        assert not fits(calendar, date(2025, 11, 17), "09:00", "10:00")
+        assert fits(calendar, date(2025, 11, 17), "14:00", "15:00")
+        assert fits(calendar, date(2025, 11, 24), "09:00", "10:00")  # template again
+
+
+def test_tolerance_at_block_edges():
+    index = AvailabilityIndex.from_free_time({"Mon": [["09:00", "10:00"], ["10:30", "11:00"]]})
+    exact = index.calendar(MONDAY, MONDAY)
+    padded = index.calendar(MONDAY, MONDAY, pad=15)
+
+    assert fits(exact, MONDAY, "09:00", "10:00")
+    assert not fits(exact, MONDAY, "08:59", "10:00")
+    assert fits(padded, MONDAY, "08:45", "10:15")
+    assert not fits(padded, MONDAY, "08:44", "10:00")
+    assert not fits(padded, MONDAY, "09:00", "10:16")
+    # The padded blocks touch at 10:15, but the busy gap still separates them.
+    assert not fits(padded, MONDAY, "09:30", "10:40")
+
+    # free_minutes ignores the padding: 09:30-10:00 and 10:30-10:40.
+    assert padded.free_minutes(minute(MONDAY, "09:30"), minute(MONDAY, "10:40")) == 40
+
+
+def test_events_past_midnight_see_the_next_day():
+    index = AvailabilityIndex.from_free_time({"Mon": [["22:00", "24:00"]], "Tue": [["00:00", "01:00"]]})
+    calendar = index.calendar(MONDAY, MONDAY)
+    start = minute(MONDAY, "23:30")
+    assert calendar.fits(start, start + 90)
+    assert not calendar.fits(start, start + 91)
+
+
+def test_v1_index_file_still_loads(tmp_path, monkeypatch):
+    monkeypatch.setattr(availability_service, "AVAILABILITY_DIR", str(tmp_path))
+    counts = [1, 0, 2, 0, 0, 0, 0]
+    pairs = [8 * 60, 10 * 60, 9 * 60, 11 * 60, 13 * 60, 14 * 60]
+    raw = struct.pack("<4sB7H", b"BCAV", 1, *counts) + struct.pack(f"<{len(pairs)}H", *pairs)
+    with open(availability_service.index_path("legacy"), "wb") as f:
+        f.write(raw)
+
+    index = availability_service.load_availability("legacy")
+    free_time = index.to_free_time()
+    assert free_time["Mon"] == [["08:00", "10:00"]]
+    assert free_time["Wed"] == [["09:00", "11:00"], ["13:00", "14:00"]]
+    assert index.dated == {}
+
+
+@pytest.mark.parametrize("free_time", [
+    {"Monday": [["08:00", "09:00"]]},
+    {"Mon": "x"},
+    {"Mon": [["99:00", "10:00"]]},
+    {"Mon": [["10:00", "09:00"]]},
+    [{"day": "Mon", "from": "8am", "to": "09:00"}],
+    [{"day": "Mon", "from": "08:00", "to": "24:00"}],
+    "Mon 08:00-09:00",
+])
+def test_malformed_free_time_is_rejected(free_time):
+    with pytest.raises(ValueError):
+        AvailabilityIndex.from_free_time(free_time)
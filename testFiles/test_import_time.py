@@ -0,0 +1,74 @@
+# testFiles/test_import_time.py
+# ---------------------------------------------------
+# Startup budget for the Flask app, measured with `python -X importtime`.
+#
+#   python -m pytest testFiles/test_import_time.py
+#
+# create_app() must stay cheap for pre-fork workers: services (and the
+# requests/pytz/httpx stack behind them) load on first use only. The one
+# eager extra is dotenv, which create_app() uses to load .env up front.
+# ---------------------------------------------------
+
+import os
+import subprocess
+import sys
+import tempfile
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Cumulative import time of everything create_app() pulls in, in µs.
+IMPORT_BUDGET_US = int(os.getenv("IMPORT_BUDGET_US", "200000"))
+
+LAZY_MODULES = ("requests", "pytz", "httpx", "backend.services", "backend.auth")
+
+STARTUP = "import backend.app as m; m.create_app()"
+
+
+def parse_importtime(stderr):
+    """
+    Parse `-X importtime` output into {module: cumulative_us} and the
+    summed cumulative time of top-level imports.
+    Lines look like: 'import time:   self [us] | cumulative | imported package'
+    """
+    modules = {}
+    top_level = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth_name = name[1:]  # one separator space, then two per nesting level
+        modules[depth_name.strip()] = int(cumulative)
+        if not depth_name.startswith(" "):
+            top_level[depth_name.strip()] = int(cumulative)
+    return modules, top_level
+
+
+def run_importtime(code, cwd):
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT, PYTHONDONTWRITEBYTECODE="1")
+    res = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=cwd, env=env, capture_output=True, text=True,
+    )
+    assert res.returncode == 0, res.stderr
+    return parse_importtime(res.stderr)
+
+
+def test_create_app_within_import_budget():
+    _, baseline = run_importtime("pass", REPO_ROOT)
+    _, top_level = run_importtime(STARTUP, REPO_ROOT)
+
+    # Interpreter startup (site, encodings, ...) is not ours to budget.
+    total = sum(us for name, us in top_level.items() if name not in baseline)
+    assert total < IMPORT_BUDGET_US, f"app import took {total / 1000:.1f} ms"
+
+
+def test_services_load_lazily():
+    modules, _ = run_importtime(STARTUP, REPO_ROOT)
+    eager = [m for m in modules if m.startswith(LAZY_MODULES)]
+    assert not eager, f"imported at startup: {eager}"
+
+
+def test_starts_from_any_directory():
+    with tempfile.TemporaryDirectory() as cwd:
+        modules, _ = run_importtime(STARTUP, cwd)
+    assert "backend.routes.event_routes" in modules
@@ -0,0 +1,114 @@
+# testFiles/test_itinerary.py
+# ---------------------------------------------------
+# Itinerary builder checks against brute force on small random inputs.
+#
+#   python -m pytest testFiles/test_itinerary.py
+#
+# build_itinerary() must reach the best total weight of any mutually
+# compatible subset; conflict_report() must list exactly the pairs a
+# check of every pair finds.
+# ---------------------------------------------------
+
+import itertools
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, REPO_ROOT)
+
+from backend.services.itinerary_service import build_itinerary, conflict_report  # noqa: E402
+
+DAY = datetime(2025, 11, 10)  # a Monday
+BUFFER = 15
+ROUNDS = 300
+
+
+def make_event(i, start_min, duration, location, weight=1):
+    start = DAY + timedelta(minutes=start_min)
+    end = start + timedelta(minutes=duration)
+    return {
+        "id": i,
+        "name": f"Event {i}",
+        "start": start.strftime("%Y-%m-%d %I:%M %p EST"),
+        "end": end.strftime("%I:%M %p EST"),
+        "location": location,
+        "weight": weight,
+        "_span": (start_min, start_min + duration),
+    }
+
+
+def random_events(rng, n):
+    return [
+        make_event(i, rng.randrange(8 * 60, 20 * 60, 5), rng.choice((15, 30, 60, 90)),
+                   rng.choice(("Union", "SAC", "union ", None)), rng.choice((1, 2, 3)))
+        for i in range(n)
+    ]
+
+
+def gap(a, b):
+    la, lb = (a["location"] or "").strip().lower(), (b["location"] or "").strip().lower()
+    return 0 if la and la == lb else BUFFER
+
+
+def pair_reason(a, b):
+    """None, 'overlap' or 'travel' for two events (either order)."""
+    (sa, ea), (sb, eb) = a["_span"], b["_span"]
+    if sa < eb and sb < ea:
+        return "overlap"
+    first, second = (a, b) if ea <= sb else (b, a)
+    if second["_span"][0] < first["_span"][1] + gap(first, second):
+        return "travel"
+    return None
+
+
+def brute_best_weight(events):
+    best = 0
+    for r in range(1, len(events) + 1):
+        for subset in itertools.combinations(events, r):
+            if all(pair_reason(a, b) is None for a, b in itertools.combinations(subset, 2)):
+                best = max(best, sum(e["weight"] for e in subset))
+    return best
+
+
+def test_build_itinerary_matches_brute_force():
+    rng = random.Random(0)
+    for _ in range(ROUNDS):
+        events = random_events(rng, rng.randrange(1, 9))
+        result = build_itinerary(events, None, BUFFER)
+        selected = result["selected"]
+        assert all(pair_reason(a, b) is None for a, b in itertools.combinations(selected, 2))
+        assert result["total_weight"] == sum(e["weight"] for e in selected)
+        assert result["total_weight"] == brute_best_weight(events)
+        assert len(selected) + len(result["dropped"]) == len(events)
+
+
+def test_conflict_report_matches_all_pairs():
+    rng = random.Random(1)
+    for _ in range(ROUNDS):
+        events = random_events(rng, rng.randrange(1, 12))
+        result = conflict_report(events, None, BUFFER)
+        found = {(frozenset((c["first"]["id"], c["second"]["id"])), c["reason"])
+                 for c in result["conflicts"]}
+        expected = {(frozenset((a["id"], b["id"])), pair_reason(a, b))
+                    for a, b in itertools.combinations(events, 2) if pair_reason(a, b)}
+        assert len(found) == len(result["conflicts"])
+        assert found == expected
+
+
+def test_conflicts_outside_free_time_are_still_reported():
+    free_time = {"Mon": [["08:00", "12:00"]]}
+    a = make_event(1, 18 * 60, 60, "Union")
+    b = make_event(2, 18 * 60, 60, "SAC")
+    c = make_event(3, 9 * 60, 60, "Union")
+
+    report = conflict_report([a, b, c], free_time, BUFFER)
+    assert [(x["first"]["id"], x["second"]["id"], x["reason"]) for x in report["conflicts"]] \
+        == [(1, 2, "overlap")]
+    assert [e["id"] for e in report["outside_free_time"]] == [1, 2]
+
+    itinerary = build_itinerary([a, b, c], free_time, BUFFER)
+    assert [e["id"] for e in itinerary["selected"]] == [3]
+    assert [e["id"] for e in itinerary["outside_free_time"]] == [1, 2]
+    assert itinerary["dropped"] == []